@@ -0,0 +1,447 @@
+import argparse
+import heapq
+import math
+import multiprocessing
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+from settings import *
+from simulation import BLUEPRINTS, PLAYER_START, InputState, LevelLayout, PlayerBody, build_grid, generate_layout, reached_goal, sprite_size
+
+DT = 1 / FRAMERATE_LIMIT
+ACTION_FRAMES = 6  # Each search edge holds one input for this many frames
+POSITION_STEP = 16  # Pixels per bucket when deciding two states are the same
+VELOCITY_STEP = 100
+EXPANSIONS_PER_SCREEN = 20000  # Search budget; a level that runs it out is reported as undecided
+
+# Jump is only pressed on an action's first frame, so every jump action is a fresh press
+ACTIONS = (
+    (1, False), (1, True), (0, True), (-1, True), (-1, False), (0, False),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Analysis:
+    index: int
+    seed: int | None
+    solvable: bool | None  # None when the search ran out of budget before deciding
+    frames: int = 0
+    jumps: int = 0
+    expanded: int = 0
+    difficulty: float | None = None
+    inputs: tuple = ()  # (InputState, frames) runs
+
+
+def action_inputs(action):
+    direction, jump = action
+    first = InputState(left=direction < 0, right=direction > 0, jump=jump)
+    rest = InputState(left=direction < 0, right=direction > 0)
+    return [first] + [rest] * (ACTION_FRAMES - 1)
+
+
+_ACTION_INPUTS = [action_inputs(action) for action in ACTIONS]
+
+
+def quantize(body):
+    return (
+        int(body.pos_x) // POSITION_STEP,
+        int(body.pos_y) // POSITION_STEP,
+        int(body.vel_x) // VELOCITY_STEP,
+        int(body.vel_y) // VELOCITY_STEP,
+        body.on_ground,
+        body.coyote_timer > 0,
+        body.jump_buffer_timer > 0,
+        body.was_jump_pressed,
+    )
+
+
+def frames_to_goal(body):
+    # Running flat out is the fastest way right, so this never overestimates
+    distance = body.world_width - TILE_SIZE - body.rect.centerx
+    if distance <= 0:
+        return 0
+    return math.ceil(distance / body.speed / DT)
+
+
+def max_expansions(width=WIDTH):
+    return EXPANSIONS_PER_SCREEN * math.ceil(width / WIDTH)
+
+
+def search(tiles, size, start=PLAYER_START, weight=1.0, width=WIDTH):
+    # A* over action sequences; states are deduplicated on their quantised key but stepped exactly.
+    # Returns (solution, expanded, decided): no solution is only a proof when the frontier ran dry.
+    budget = max_expansions(width)
+    grid = build_grid(LevelLayout(0, list(tiles)))
+    body = PlayerBody(start[0], start[1], *size, world_width=width)
+    root = body.snapshot()
+    parents = [(-1, None)]
+    best = {quantize(body): 0}
+    # Ties on time go to the path with fewer jump presses
+    frontier = [(weight * frames_to_goal(body), 0, 0, 0, root)]
+    expanded = 0
+
+    while frontier and expanded < budget:
+        _, jumps, cost, node, state = heapq.heappop(frontier)
+        expanded += 1
+        for action, inputs in zip(ACTIONS, _ACTION_INPUTS):
+            body.restore(state)
+            frames = 0
+            finished = False
+            for input_state in inputs:
+                body.step(grid, input_state, DT)
+                frames += 1
+                if reached_goal(body):
+                    finished = True
+                    break
+            parents.append((node, (action, frames)))
+            if finished:
+                return _unwind(parents, len(parents) - 1), expanded, True
+
+            key = quantize(body)
+            next_cost = cost + frames
+            if best.get(key, next_cost + 1) <= next_cost:
+                continue
+            best[key] = next_cost
+            priority = next_cost + weight * frames_to_goal(body)
+            heapq.heappush(frontier, (priority, jumps + action[1], next_cost, len(parents) - 1, body.snapshot()))
+    return None, expanded, not frontier
+
+
+def reachable(tiles, size, start=PLAYER_START, width=WIDTH):
+    # A cheap flood fill that can prove the goal out of reach, so the search never has to exhaust
+    # every state of a level with no way through. Cells are split where the player starts or stops
+    # touching a tile, so every position in a cell overlaps the same tiles. Each step is one frame,
+    # generous everywhere: height is capped by a jump from the places the player has stood, and a
+    # collision push-out can carry a player already inside a tile clean through it, as the game does.
+    width_px, height_px = size
+    solid = set(tiles)
+    body = PlayerBody(start[0], start[1], width_px, height_px, width)
+    slack = body.jump_height * DT + TILE_SIZE // 3  # A frame of rounding, and the step-up assist's lift
+    rise = body.jump_height ** 2 / (2 * GRAVITY) + slack
+    reach_x, reach_y = body.speed * DT + 1, MAX_FALL_SPEED * DT + 1
+    right = width - width_px // 2  # Half the player may cross the right edge
+    goal_x = width - TILE_SIZE - width_px // 2
+    if not solid or goal_x <= 0:
+        return True
+    top = min(y for _, y in solid) - height_px - rise - 1
+
+    xs = {0, right, goal_x}
+    ys = {top}
+    for x, y in solid:
+        xs.update((x - width_px, x + TILE_SIZE))
+        ys.update((y - height_px, y + TILE_SIZE))
+    x_cells = _cells(sorted(x for x in xs if 0 <= x <= right))
+    y_cells = _cells(sorted(y for y in ys if y >= top))
+    x_near, y_near = _near(x_cells, reach_x), _near(y_cells, reach_y)
+    x_index = {low: k for k, (low, high) in enumerate(x_cells) if low == high}
+    y_index = {low: k for k, (low, high) in enumerate(y_cells) if low == high}
+    bottom = y_cells[-1][0]
+
+    def touching(x_low, x_high, y_low, y_high):
+        # Tiles the player overlaps at some position in the box
+        columns = range(math.floor((x_low - TILE_SIZE) / TILE_SIZE) + 1, math.ceil((x_high + width_px) / TILE_SIZE))
+        rows = range(math.floor((y_low - TILE_SIZE) / TILE_SIZE) + 1, math.ceil((y_high + height_px) / TILE_SIZE))
+        return [
+            (column * TILE_SIZE, row * TILE_SIZE)
+            for column in columns for row in rows if (column * TILE_SIZE, row * TILE_SIZE) in solid
+        ]
+
+    blocked = {}
+
+    def inside(i, j):
+        if (i, j) not in blocked:
+            x, y = sum(x_cells[i]) / 2, sum(y_cells[j]) / 2
+            blocked[i, j] = bool(touching(x, x, y, y))
+        return blocked[i, j]
+
+    def standing(i, j):
+        (x_low, x_high), (y, y_high) = x_cells[i], y_cells[j]
+        x = (x_low + x_high) / 2
+        return y == y_high and any(tile[1] == y + height_px for tile in touching(x, x, y + 1, y + 1))
+
+    across = {}
+
+    def horizontal(i, j):
+        # A free move, or a push out of a tile; only a player already inside one can be pushed
+        # further than the frame moved it. The step-up assist lifts it onto the ledge as well.
+        if (i, j) not in across:
+            (x_low, x_high), (y_low, y_high) = x_cells[i], y_cells[j]
+            stuck = inside(i, j)
+            moves = {(k, j, False) for k in x_near[i] if not inside(k, j)}
+            for tile_x, tile_y in touching(x_low - reach_x, x_high + reach_x, y_low, y_high):
+                sides = {x_index.get(tile_x - width_px), x_index.get(tile_x + TILE_SIZE)} - {None}
+                sides = {k for k in sides if stuck or k in x_near[i]}
+                moves.update((k, j, stuck) for k in sides)
+                ledge = tile_y - height_px
+                if ledge in y_index and y_low - TILE_SIZE // 3 <= ledge < y_high:
+                    moves.update((k, y_index[ledge], stuck) for k in sides | ({i} if stuck else set()))
+            across[i, j] = list(moves)
+        return across[i, j]
+
+    down = {}
+
+    def vertical(i, j):
+        # Fall or rise, or be pushed onto or under a tile: (row, pushed, landed on top, pushed from
+        # inside a tile), or None for a push somewhere the cells do not cover
+        if (i, j) not in down:
+            (x_low, x_high), (y_low, y_high) = x_cells[i], y_cells[j]
+            stuck = inside(i, j)
+            moves = [(m, False, False, False) for m in y_near[j] if not inside(i, m)]
+            if stuck:
+                moves.append((j, True, False, True))  # Pushes can chain through several tiles in one pass
+            for tile_x, tile_y in touching(x_low, x_high, y_low - reach_y, y_high + reach_y):
+                for y, on_top in ((tile_y - height_px, True), (tile_y + TILE_SIZE, False)):
+                    m = y_index.get(y)
+                    if m is None:
+                        moves.append(None)
+                    elif stuck or m in y_near[j]:
+                        moves.append((m, True, on_top, stuck))
+            down[i, j] = moves
+        return down[i, j]
+
+    # No airborne player is higher than a jump from where it last stood allows, and the further it
+    # has drifted sideways since, the lower it must be. `ceiling` holds that bound for each column
+    # over every place stood on so far; cells above it wait in case a later footing lowers it.
+    peak = body.jump_height / GRAVITY
+
+    def jump_height(distance):
+        time = max(distance / body.speed, peak)
+        return body.jump_height * time - GRAVITY * time ** 2 / 2 + slack
+
+    ceiling = [math.inf] * len(x_cells)
+    waiting = [[] for _ in x_cells]
+    best = {}  # (column, row, pushed clean through a tile since the last footing) -> smallest y it can rise to
+    queue = deque()
+
+    def visit(state, apex):
+        if best.get(state, math.inf) <= apex:
+            return
+        i, j, drifted = state
+        if not drifted and y_cells[j][1] < ceiling[i]:
+            waiting[i].append((state, apex))
+            return
+        best[state] = apex
+        queue.append(state)
+
+    footings = set()
+
+    def stood(i, y):
+        # Lower the ceiling around a footing at height y, releasing whatever it had held back
+        if (i, y) in footings:
+            return
+        footings.add((i, y))
+        for columns in (range(i, len(x_cells)), range(i, -1, -1)):
+            for k in columns:
+                distance = max(0, x_cells[k][0] - x_cells[i][1], x_cells[i][0] - x_cells[k][1])
+                limit = y - jump_height(distance)
+                if limit > bottom:
+                    break
+                if limit < ceiling[k]:
+                    ceiling[k] = limit
+                    held, waiting[k] = waiting[k], []
+                    for state, apex in held:
+                        visit(state, apex)
+
+    # The player spawns inside the ground, where a push can go anywhere, so the fill starts
+    # from wherever one real action of each kind leaves it
+    grid = build_grid(LevelLayout(0, list(tiles)))
+    root = body.snapshot()
+    for inputs in _ACTION_INPUTS:
+        body.restore(root)
+        for input_state in inputs:
+            body.step(grid, input_state, DT)
+            if reached_goal(body):
+                return True
+        apex = body.rect.y - slack - (body.vel_y ** 2 / (2 * GRAVITY) if body.vel_y < 0 else 0)
+        if body.on_ground or body.coyote_timer > 0:
+            apex = min(apex, body.rect.y - rise)
+        i, j = _cell_of(body.rect.x, x_cells), _cell_of(body.rect.y, y_cells)
+        stood(i, apex + rise)  # A footing with the same apex; its ceiling sits no lower than the real one
+        visit((i, j, False), apex)
+
+    while queue:
+        i, j, drifted = state = queue.popleft()
+        if x_cells[i][0] >= goal_x:
+            return True
+        apex = best[state]
+        if standing(i, j):
+            apex = min(apex, y_cells[j][0] - rise)
+            stood(i, y_cells[j][0])
+            drifted = False  # The ceiling holds again from a footing it knows about
+        for k, row, deep in horizontal(i, j):
+            for move in vertical(k, row):
+                if move is None:
+                    return True
+                m, pushed, on_top, deeper = move
+                drifted_now = drifted or deep or deeper
+                if on_top:
+                    visit((k, m, drifted_now), y_cells[m][0] - rise)
+                elif pushed or y_cells[m][1] >= apex:
+                    visit((k, m, drifted_now), apex)
+    return False
+
+
+def _cells(points):
+    # Each critical coordinate is a cell of its own, and so is each open gap between two of them
+    cells = []
+    for low, high in zip(points, points[1:]):
+        cells += [(low, low), (low, high)]
+    return cells + [(points[-1], points[-1])]
+
+
+def _near(cells, reach):
+    # The cells one frame's movement can reach from each cell
+    return [[k for k, (low, high) in enumerate(cells) if high >= lo - reach and low <= hi + reach] for lo, hi in cells]
+
+
+def _cell_of(value, cells):
+    value = min(max(value, cells[0][0]), cells[-1][0])
+    return next(k for k, (low, high) in enumerate(cells) if low == value or low < value < high)
+
+
+def _unwind(parents, node):
+    steps = []
+    while node > 0:
+        node, step = parents[node]
+        steps.append(step)
+    steps.reverse()
+
+    runs = []
+    for (direction, jump), frames in steps:
+        for input_state in action_inputs((direction, jump))[:frames]:
+            if runs and runs[-1][0] == input_state:
+                runs[-1][1] += 1
+            else:
+                runs.append([input_state, 1])
+    return tuple((state, frames) for state, frames in runs)
+
+
+@lru_cache(maxsize=None)
+def par_frames(size, width=WIDTH):
+    # Time to run across an empty level: the yardstick for how much a layout slows the player down
+    solution, _, _ = search(_ground_tiles(width), size, width=width)
+    return sum(frames for _, frames in solution)
+
+
+def _ground_tiles(width):
+    return tuple((x, HEIGHT - TILE_SIZE) for x in range(0, width, TILE_SIZE))
+
+
+def difficulty(frames, jumps, size, width=WIDTH):
+    # Each required jump counts one point, plus a point per 10% of extra time over an empty level
+    detour = max(0.0, frames / par_frames(size, width) - 1)
+    return round(jumps + detour * 10, 2)
+
+
+@lru_cache(maxsize=4096)
+def analyze_geometry(tiles, size, weight=1.0, width=WIDTH):
+    # Only the tiles matter to the search, so results are shared by every layout with the same geometry
+    if not reachable(tiles, size, width=width):
+        return False, 0, 0, 0, None, ()
+    solution, expanded, decided = search(tiles, size, weight=weight, width=width)
+    if solution is None:
+        return (False if decided else None), 0, 0, expanded, None, ()
+    frames = sum(count for _, count in solution)
+    jumps = sum(1 for state, _ in solution if state.jump)
+    return True, frames, jumps, expanded, difficulty(frames, jumps, size, width), solution
+
+
+def analyze_layout(layout, size=None, seed=None, weight=1.0):
+    size = size if size is not None else sprite_size()
+    return Analysis(layout.index, seed, *analyze_geometry(geometry(layout), size, weight, layout.width))
+
+
+def analyze(index, seed=None, blueprint=None, size=None, weight=1.0):
+    return analyze_layout(generate_layout(index, blueprint, seed), size, seed, weight)
+
+
+def geometry(layout):
+    # Tile order is kept: collisions resolve in insertion order
+    return tuple(layout.tiles)
+
+
+def sweep(indices, seeds=(None,), processes=1, weight=1.0):
+    # Layouts are cheap to generate; searches are not, so each distinct geometry is searched once
+    size = sprite_size()
+    layouts = [(seed, generate_layout(index, seed=seed)) for index in indices for seed in seeds]
+    unique = list(dict.fromkeys((geometry(layout), layout.width) for _, layout in layouts))
+    jobs = [(tiles, size, weight, width) for tiles, width in unique]
+    if processes == 1:
+        outcomes = [analyze_geometry(*job) for job in jobs]
+    else:
+        with multiprocessing.Pool(processes or None) as pool:
+            outcomes = pool.starmap(analyze_geometry, jobs, chunksize=4)
+    results = dict(zip(unique, outcomes))
+    return [Analysis(layout.index, seed, *results[geometry(layout), layout.width]) for seed, layout in layouts]
+
+
+def describe_inputs(runs):
+    parts = []
+    for state, frames in runs:
+        keys = "+".join(name for name, held in (("left", state.left), ("right", state.right), ("jump", state.jump)) if held)
+        parts.append(f"{keys or 'idle'}x{frames}")
+    return " ".join(parts)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check that levels can be completed and rate how hard they are.")
+    # Level indices cycle through every blueprint at each lane shift
+    parser.add_argument("--levels", type=int, default=len(MESSAGES), help="number of level indices to check")
+    parser.add_argument("--seeds", type=int, default=0, help="sweep this many layout seeds per level instead of the game's own")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes (0 = one per core)")
+    parser.add_argument("--weight", type=float, default=1.0, help="heuristic weight; above 1 trades shorter inputs for speed")
+    parser.add_argument("--inputs", action="store_true", help="print the input sequence for each level")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    indices = range(args.levels)
+    seeds = range(args.seeds) if args.seeds else (None,)
+
+    start = time.perf_counter()
+    results = sweep(indices, seeds, args.processes, args.weight)
+    elapsed = time.perf_counter() - start
+
+    if not args.seeds:
+        for result in results:
+            blueprint = result.index % len(BLUEPRINTS)
+            if result.solvable:
+                print(
+                    f"level {result.index:2d} (blueprint {blueprint}): solvable in {result.frames} frames, "
+                    f"{result.jumps} jumps, difficulty {result.difficulty:.2f} ({result.expanded} states)"
+                )
+                if args.inputs:
+                    print(f"    {describe_inputs(result.inputs)}")
+            elif result.solvable is None:
+                print(f"level {result.index:2d} (blueprint {blueprint}): UNDECIDED (gave up after {result.expanded} states)")
+            else:
+                reason = f"{result.expanded} states searched" if result.expanded else "the goal is out of reach"
+                print(f"level {result.index:2d} (blueprint {blueprint}): UNSOLVABLE ({reason})")
+    else:
+        for index in indices:
+            level_results = [result for result in results if result.index == index]
+            solved = [result for result in level_results if result.solvable]
+            unsolved = [result.seed for result in level_results if result.solvable is False]
+            undecided = [result.seed for result in level_results if result.solvable is None]
+            line = f"level {index:2d}: {len(solved)}/{len(level_results)} seeds solvable"
+            if solved:
+                scores = [result.difficulty for result in solved]
+                line += f", difficulty {min(scores):.2f}-{max(scores):.2f}"
+            if unsolved:
+                line += f", unsolvable seeds {unsolved[:8]}{' ...' if len(unsolved) > 8 else ''}"
+            if undecided:
+                line += f", undecided seeds {undecided[:8]}{' ...' if len(undecided) > 8 else ''}"
+            print(line)
+
+    unsolvable = sum(1 for result in results if result.solvable is False)
+    undecided = sum(1 for result in results if result.solvable is None)
+    print(f"{len(results)} layouts analysed in {elapsed:.2f}s, {unsolvable} unsolvable, {undecided} undecided")
+    return 1 if unsolvable or undecided else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
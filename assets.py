@@ -0,0 +1,72 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from surfaces import create
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))  # Assets ship next to the code, wherever it is run from
+
+_images = {}  # Decoded images by file name, shared by the whole process; None for missing files
+
+
+def asset_path(name):
+    return os.path.join(ASSET_DIR, name)
+
+
+def _decode(name):
+    try:
+        return pygame.image.load(asset_path(name))
+    except (OSError, pygame.error):
+        return None
+
+
+def load_images(names):
+    # Images are returned unconverted, so this also works before the display exists
+    pending = [name for name in dict.fromkeys(names) if name not in _images]
+    if len(pending) == 1:
+        _images[pending[0]] = _decode(pending[0])
+    elif pending:
+        # SDL_image decodes with the GIL released, so files decode side by side
+        with ThreadPoolExecutor(min(len(pending), (os.cpu_count() or 1) + 4)) as pool:
+            _images.update(zip(pending, pool.map(_decode, pending)))
+    return {name: _images[name] for name in names}
+
+
+def file_digest(names):
+    # Contents of the asset files, so edited artwork never matches an older cache entry
+    digest = hashlib.blake2b(digest_size=16)
+    for name in names:
+        try:
+            with open(asset_path(name), "rb") as handle:
+                digest.update(handle.read())
+        except OSError:
+            digest.update(b"missing")
+        digest.update(name.encode())
+    return digest.hexdigest()
+
+
+def pack_frames(images, cell_size):
+    # Every image centred in its own cell, cells side by side in one surface
+    width, height = cell_size
+    strip = create((width * len(images), height))
+    for index, image in enumerate(images):
+        strip.blit(image, image.get_rect(center=(index * width + width // 2, height // 2)))
+    return strip
+
+
+class SpriteAtlas:
+    # Equal-sized frames packed into one surface; frames are subsurfaces of it
+    def __init__(self, surface, names):
+        self.surface = surface
+        self.names = list(names)
+        self.cell_width = surface.get_width() // len(self.names)
+        self.cell_height = surface.get_height()
+        self.frames = {name: surface.subsurface(self.area(index)) for index, name in enumerate(self.names)}
+
+    def area(self, index):
+        return pygame.Rect(index * self.cell_width, 0, self.cell_width, self.cell_height)
+
+    def __getitem__(self, name):
+        return self.frames[name]
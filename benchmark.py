@@ -0,0 +1,300 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import pygame
+import pygame.freetype
+from pygame.locals import *
+
+import rng
+from settings import *
+
+
+class ScriptedKeys:
+    # Deterministic stand-in for pygame.key.get_pressed(): walk right, hop regularly, backtrack now and then
+    def __init__(self):
+        self.frame = 0
+        self.pressed = set()
+
+    def advance(self):
+        self.frame += 1
+        frame = self.frame
+        self.pressed = set()
+        if frame % 240 < 200:
+            self.pressed.add(K_RIGHT)
+        else:
+            self.pressed.add(K_LEFT)
+        if frame % 36 < 4:
+            self.pressed.add(K_SPACE)
+
+    def __call__(self):
+        return self
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    return {
+        "samples": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed(samples: int, step) -> dict:
+    times = []
+    clock = time.perf_counter
+    for index in range(samples):
+        start = clock()
+        step(index)
+        times.append(clock() - start)
+    return summarize(times)
+
+
+def bench_level_generate(frames: int) -> dict:
+    from level import Level
+
+    levels = [Level(index=i, message=message) for i, message in enumerate(MESSAGES)]
+    return timed(frames, lambda i: levels[i % len(levels)].generate_level())
+
+
+def bench_tile_construction(frames: int) -> dict:
+    from tile import Tile, get_atlas
+
+    get_atlas()
+    columns = WIDTH // TILE_SIZE
+
+    def build(i):
+        for column in range(columns):
+            Tile(column * TILE_SIZE, HEIGHT - TILE_SIZE)
+
+    return timed(frames, build)
+
+
+def bench_player_update(frames: int) -> dict:
+    from level import Level
+    from player import Player
+
+    level = Level(index=0, message="")
+    player = Player(100, HEIGHT - TILE_SIZE * 2)
+    keys = ScriptedKeys()
+    player.key_source = keys
+
+    def step(i):
+        keys.advance()
+        player.update(level.grid, 1 / FRAMERATE_LIMIT)
+
+    return timed(frames, step)
+
+
+def _running_fireworks(bursts: int):
+    from fireworks import Fireworks
+
+    fireworks = Fireworks()
+    fireworks.duration = float("inf")
+    fireworks.start(bursts=bursts)
+    return fireworks
+
+
+def bench_scrolling_level(frames: int, screens: int = 200) -> dict:
+    # A wide level scrolled at walking pace from its middle: cost should not depend on its width
+    from level import Level
+    from simulation import generate_layout
+
+    level = Level(index=0, message="", layout=generate_layout(0, screens=screens))
+    surface = pygame.display.get_surface()
+    start = level.width // 2
+
+    def step(i):
+        level.draw(surface, min(start + i * 5, level.width - WIDTH))
+
+    return timed(frames, step)
+
+
+def bench_fireworks_update(frames: int, bursts: int = 20) -> dict:
+    fireworks = _running_fireworks(bursts)
+
+    def step(i):
+        if fireworks.particle_count < bursts * 30:
+            fireworks.start(bursts=bursts)
+        fireworks.update(1 / FRAMERATE_LIMIT)
+
+    return timed(frames, step)
+
+
+def bench_fireworks_draw(frames: int, bursts: int = 20) -> dict:
+    fireworks = _running_fireworks(bursts)
+    fireworks.update(0.2)
+    surface = pygame.display.get_surface()
+    return timed(frames, lambda i: fireworks.draw(surface))
+
+
+def bench_background_draw(frames: int) -> dict:
+    from main import Background
+
+    background = Background()
+    surface = pygame.display.get_surface()
+
+    def step(i):
+        background.update(1 / FRAMERATE_LIMIT)
+        background.draw(surface, (i % 600) / 600)
+
+    return timed(frames, step)
+
+
+def bench_wrap_text(frames: int) -> dict:
+    from main import wrap_text
+    from text_layout import layout_text
+
+    font = pygame.freetype.Font(None, 30)
+    paragraph = " ".join(MESSAGES)
+
+    def step(i):
+        layout_text.cache_clear()
+        wrap_text(font, paragraph, 420)
+
+    return timed(frames, step)
+
+
+def bench_game_frame(frames: int, dirty: bool = False, textures: bool = False, scale: float = 1) -> dict:
+    from dirty_rects import DirtyRectRenderer
+    from main import Game, load_fonts
+    from scaling import ScaledCanvas, internal_size
+    from texture_canvas import TextureCanvas
+
+    screen = pygame.display.get_surface()
+    if scale != 1:
+        # Drawn off screen at the internal resolution; presenting it is SDL's job
+        screen = ScaledCanvas(pygame.Surface(internal_size(scale)).convert(), scale)
+    game = Game(load_fonts())
+    keys = ScriptedKeys()
+    game.player.key_source = keys
+    renderer = DirtyRectRenderer(screen) if dirty else None
+    canvas = TextureCanvas("benchmark") if textures else None
+
+    def step(i):
+        keys.advance()
+        for event in pygame.event.get():
+            game.handle_event(event)
+        game.update(1 / FRAMERATE_LIMIT)
+        if canvas is not None:
+            canvas.clear()
+            game.draw(canvas)
+            canvas.present()
+        elif renderer is not None:
+            renderer.render(game)
+        else:
+            game.draw(screen)
+            if scale == 1:
+                pygame.display.flip()
+
+    return timed(frames, step)
+
+
+BENCHMARKS = {
+    "level_generate": bench_level_generate,
+    "tile_construction": bench_tile_construction,
+    "player_update": bench_player_update,
+    "scrolling_level": bench_scrolling_level,
+    "fireworks_update": bench_fireworks_update,
+    "fireworks_draw": bench_fireworks_draw,
+    "background_draw": bench_background_draw,
+    "wrap_text": bench_wrap_text,
+    "game_frame": bench_game_frame,
+    "game_frame_dirty": lambda frames: bench_game_frame(frames, dirty=True),
+    "game_frame_texture": lambda frames: bench_game_frame(frames, textures=True),
+    "game_frame_scaled": lambda frames: bench_game_frame(frames, scale=2),
+}
+
+
+def compare(results: dict, baseline: dict, threshold: float, metric: str) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or metric not in previous:
+            continue
+        limit = previous[metric] * (1 + threshold)
+        if result[metric] > limit:
+            regressions.append(
+                f"{name}: {metric} {result[metric]:.3f} ms > {previous[metric]:.3f} ms (+{threshold:.0%} allowed)"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless, deterministic benchmarks for You and Me.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--frames", type=int, default=600, help="samples per benchmark")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before failing, e.g. 0.15")
+    parser.add_argument("--metric", default="p50_ms", choices=["mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"])
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    pygame.init()
+    pygame.freetype.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+
+    results = {}
+    for name in args.names or list(BENCHMARKS):
+        random.seed(args.seed)
+        rng.seed(args.seed)
+        results[name] = BENCHMARKS[name](args.frames)
+        summary = results[name]
+        print(
+            f"{name:<20} p50 {summary['p50_ms']:8.3f} ms  p90 {summary['p90_ms']:8.3f} ms  "
+            f"p99 {summary['p99_ms']:8.3f} ms  max {summary['max_ms']:8.3f} ms"
+        )
+
+    report = {
+        "meta": {
+            "frames": args.frames,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+    pygame.quit()
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+from settings import *
+
+
+class Camera:
+    # Horizontal scroll over a level that may be wider than the screen
+    def __init__(self, world_width=WIDTH, view_width=WIDTH):
+        self.view_width = view_width
+        self.world_width = world_width
+        self.x = 0.0
+        self.prev_x = 0.0
+
+    def reset(self, world_width, target_x=0.0):
+        self.world_width = world_width
+        self.x = self.prev_x = self._clamp(target_x - self.view_width / 2)
+
+    def follow(self, target_x):
+        # Keep the target centred, stopping at the level edges
+        self.prev_x = self.x
+        self.x = self._clamp(target_x - self.view_width / 2)
+
+    def _clamp(self, x):
+        return max(0.0, min(x, float(self.world_width - self.view_width)))
+
+    def offset(self, interpolation=1.0):
+        return int(self.prev_x + (self.x - self.prev_x) * interpolation)
@@ -0,0 +1,55 @@
+from settings import *
+
+
+class TileGrid:
+    def __init__(self, tiles=(), cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self._order = {}  # Insertion order so queries resolve like a plain tile scan
+        self._queries = {}  # Results per cell span; tiles are static between add() calls
+        for tile in tiles:
+            self.add(tile)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def add(self, tile):
+        if tile in self._order:
+            return
+        self._order[tile] = len(self._order)
+        for key in self._cells_for(tile.rect):
+            self.cells.setdefault(key, []).append(tile)
+        self._queries.clear()
+
+    def query(self, rect):
+        # The returned tuple is shared between queries covering the same cells
+        span = self._span(rect)
+        found = self._queries.get(span)
+        if found is None:
+            found = self._queries[span] = self._collect(span)
+        return found
+
+    def _collect(self, span):
+        found = []
+        for key in self._cells_in(span):
+            bucket = self.cells.get(key)
+            if bucket:
+                found.extend(bucket)
+        if len(found) > 1:
+            # Tiles spanning several cells would otherwise be reported twice
+            found = sorted(set(found), key=self._order.__getitem__)
+        return tuple(found)
+
+    def _span(self, rect):
+        size = self.cell_size
+        return (rect.left // size, (rect.right - 1) // size, rect.top // size, (rect.bottom - 1) // size)
+
+    def _cells_in(self, span):
+        left, right, top, bottom = span
+        return [(column, row) for row in range(top, bottom + 1) for column in range(left, right + 1)]
+
+    def _cells_for(self, rect):
+        return self._cells_in(self._span(rect))
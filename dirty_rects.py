@@ -0,0 +1,69 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    # Redraws the scene only inside regions that changed and pushes just those to the display
+    def __init__(self, screen, max_regions=8, full_redraw_ratio=0.5):
+        self.screen = screen
+        self.max_regions = max_regions
+        self.full_redraw_ratio = full_redraw_ratio
+        self._previous = {}
+        self._scene_key = None
+
+    def render(self, scene):
+        screen_rect = self.screen.get_rect()
+        current = {name: (rect, state) for name, rect, state in scene.regions()}
+        scene_key = scene.scene_key()
+        full = scene_key != self._scene_key
+
+        dirty = []
+        if not full:
+            for name, (rect, state) in current.items():
+                previous = self._previous.get(name)
+                if previous == (rect, state):
+                    continue
+                if previous is not None and previous[0] is not None:
+                    dirty.append(previous[0])
+                if rect is not None:
+                    dirty.append(rect)
+            for name, (rect, _) in self._previous.items():
+                if name not in current and rect is not None:
+                    dirty.append(rect)
+            dirty = self._merge([rect.clip(screen_rect) for rect in dirty])
+            area = sum(rect.width * rect.height for rect in dirty)
+            full = area > screen_rect.width * screen_rect.height * self.full_redraw_ratio
+
+        self._previous = current
+        self._scene_key = scene_key
+
+        if full:
+            scene.draw(self.screen)
+            pygame.display.flip()
+            return [screen_rect]
+
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            scene.draw(self.screen)
+        self.screen.set_clip(None)
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+    def _merge(self, rects):
+        rects = [rect for rect in rects if rect.width and rect.height]
+        merged = []
+        # Fold overlapping rects together until nothing overlaps
+        while rects:
+            rect = rects.pop()
+            index = rect.collidelist(rects)
+            while index != -1:
+                rect = rect.union(rects.pop(index))
+                index = rect.collidelist(rects)
+            overlapping = rect.collidelist(merged)
+            if overlapping != -1:
+                rects.append(rect.union(merged.pop(overlapping)))
+                continue
+            merged.append(rect)
+        if len(merged) > self.max_regions:
+            merged = [merged[0].unionall(merged[1:])]
+        return merged
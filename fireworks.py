@@ -1,21 +1,68 @@
 import pygame
-import random
 import math  # For trigonometric functions
+from rng import game_random
 from settings import *
+from surfaces import create, finish
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; particles fall back to plain Python objects
+    np = None
+
+PARTICLE_COLORS = [RED, ORANGE, YELLOW, WHITE]
+PARTICLE_RADII = (3,)
+ALPHA_BUCKETS = 16  # Fade steps pre-rendered per colour and size
+
+
+class ParticleSprites:
+    # Every colour/alpha/size combination is rendered once and reused for all particles
+    def __init__(self, colors=PARTICLE_COLORS, radii=PARTICLE_RADII, buckets=ALPHA_BUCKETS):
+        self.buckets = buckets
+        self.color_index = {tuple(color): index for index, color in enumerate(colors)}
+        self.sprites = {}
+        for index, color in enumerate(colors):
+            for radius in radii:
+                for bucket in range(buckets):
+                    sprite = create((radius * 2, radius * 2))
+                    pygame.draw.circle(sprite, (*color, self.bucket_alpha(bucket)), (radius, radius), radius)
+                    self.sprites[(index, bucket, radius)] = finish(sprite)
+
+    def bucket(self, alpha):
+        return max(0, min(self.buckets - 1, alpha * self.buckets // 256))
+
+    def bucket_alpha(self, bucket):
+        return (bucket + 1) * 256 // self.buckets - 1
+
+    def get(self, color, alpha, radius=3):
+        index = self.color_index[tuple(color[:3])]
+        return self.sprites[(index, self.bucket(alpha), radius)]
+
+
+_sprites = None
+
+
+def get_particle_sprites():
+    global _sprites
+    if _sprites is None:
+        _sprites = ParticleSprites()
+    return _sprites
+
 
 class FireworkParticle:
     def __init__(self, x, y):
         # Corrected from Vec2 to Vector2
         self.position = pygame.math.Vector2(x, y)
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(150, 350)
+        self.prev_position = pygame.math.Vector2(x, y)
+        angle = game_random.uniform(0, 2 * math.pi)
+        speed = game_random.uniform(150, 350)
         # Corrected from Vec2 to Vector2
         self.velocity = pygame.math.Vector2(speed * math.cos(angle), speed * math.sin(angle))
-        self.lifetime = random.uniform(1, 2)
+        self.lifetime = game_random.uniform(1, 2)
         self.elapsed_time = 0
-        self.color = random.choice([RED, ORANGE, YELLOW, WHITE])
+        self.color = game_random.choice(PARTICLE_COLORS)
 
     def update(self, dt):
+        self.prev_position.update(self.position)
         self.position += self.velocity * dt
         self.velocity.y += GRAVITY * dt * 0.5
         self.elapsed_time += dt
@@ -24,43 +71,178 @@ class FireworkParticle:
             alpha = int(255 * (1 - self.elapsed_time / self.lifetime))
             self.color = (*self.color[:3], alpha)
 
-    def draw(self, surface):
+    def render_position(self, interpolation=1.0):
+        if interpolation >= 1.0:
+            return self.position
+        return self.prev_position.lerp(self.position, interpolation)
+
+    def draw(self, surface, interpolation=1.0):
         if self.elapsed_time < self.lifetime:
-            surf = pygame.Surface((6, 6), pygame.SRCALPHA)
-            pygame.draw.circle(surf, self.color, (3, 3), 3)
-            surface.blit(surf, (int(self.position.x) - 3, int(self.position.y) - 3))
+            alpha = self.color[3] if len(self.color) > 3 else 255
+            sprite = get_particle_sprites().get(self.color, alpha)
+            position = self.render_position(interpolation)
+            surface.blit(sprite, (int(position.x) - 3, int(position.y) - 3))
+
+
+class ParticleEngine:
+    # Struct-of-arrays particle store: one row per particle, integrated in bulk
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.previous = np.zeros((capacity, 2), dtype=np.float32)  # Positions before the last update
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.elapsed = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint8)  # Index into PARTICLE_COLORS
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, x, y, count):
+        self._reserve(self.count + count)
+        # Seed from game_random so bursts are reproducible when it is seeded
+        rng = np.random.default_rng(game_random.getrandbits(32))
+        angle = rng.uniform(0, 2 * math.pi, count)
+        speed = rng.uniform(150, 350, count)
+
+        start, end = self.count, self.count + count
+        self.position[start:end] = (x, y)
+        self.previous[start:end] = (x, y)
+        self.velocity[start:end, 0] = speed * np.cos(angle)
+        self.velocity[start:end, 1] = speed * np.sin(angle)
+        self.lifetime[start:end] = rng.uniform(1, 2, count)
+        self.elapsed[start:end] = 0
+        self.color[start:end] = rng.integers(0, len(PARTICLE_COLORS), count)
+        self.count = end
+
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        self.previous[:n] = self.position[:n]
+        self.position[:n] += self.velocity[:n] * dt
+        self.velocity[:n, 1] += GRAVITY * dt * 0.5
+        self.elapsed[:n] += dt
+
+        alive = self.elapsed[:n] < self.lifetime[:n]
+        remaining = int(np.count_nonzero(alive))
+        if remaining != n:
+            # Compact the survivors to the front of every array
+            for array in (self.position, self.previous, self.velocity, self.lifetime, self.elapsed, self.color):
+                array[:remaining] = array[:n][alive]
+            self.count = remaining
+
+    def render_positions(self, interpolation=1.0):
+        n = self.count
+        if interpolation >= 1.0:
+            return self.position[:n]
+        return self.previous[:n] + (self.position[:n] - self.previous[:n]) * interpolation
+
+    def alphas(self):
+        n = self.count
+        return (255 * (1 - self.elapsed[:n] / self.lifetime[:n])).astype(np.int32)
+
+    def _reserve(self, needed):
+        capacity = len(self.lifetime)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("position", "previous", "velocity", "lifetime", "elapsed", "color"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.count] = old[:self.count]
+            setattr(self, name, grown)
+
 
 class Fireworks:
-    def __init__(self):
-        self.particles = []
+    def __init__(self, vectorized=True):
+        self.engine = ParticleEngine() if vectorized and np is not None else None
+        self.particles = []  # Only used without the vectorized engine
         self.active = False
         self.timer = 0
         self.duration = 2.5
 
-    def start(self):
+    @property
+    def particle_count(self):
+        if self.engine is not None:
+            return len(self.engine)
+        return len(self.particles)
+
+    def start(self, bursts=1):
         self.active = True
         self.timer = 0
-        self.create_firework()
+        for _ in range(bursts):
+            self.create_firework()
 
-    def create_firework(self):
-        x = random.randint(200, WIDTH - 200)
-        y = random.randint(100, HEIGHT // 2)
-        for _ in range(60):
+    def create_firework(self, count=60):
+        x = game_random.randint(200, WIDTH - 200)
+        y = game_random.randint(100, HEIGHT // 2)
+        if self.engine is not None:
+            self.engine.emit(x, y, count)
+            return
+        for _ in range(count):
             self.particles.append(FireworkParticle(x, y))
 
+    def clear(self):
+        self.particles.clear()
+        if self.engine is not None:
+            self.engine.clear()
+
     def update(self, dt):
         if not self.active:
             return
         self.timer += dt
         if self.timer > self.duration:
             self.active = False
-            self.particles.clear()
+            self.clear()
+        elif self.engine is not None:
+            self.engine.update(dt)
         else:
-            for particle in self.particles[:]:
+            for particle in self.particles:
                 particle.update(dt)
-                if particle.elapsed_time >= particle.lifetime:
-                    self.particles.remove(particle)
+            self.particles = [p for p in self.particles if p.elapsed_time < p.lifetime]
 
-    def draw(self, surface):
-        for particle in self.particles:
-            particle.draw(surface)
\ No newline at end of file
+    def bounds(self, interpolation=1.0):
+        radius = PARTICLE_RADII[0]
+        if self.engine is not None:
+            if not self.engine.count:
+                return None
+            corners = self.engine.render_positions(interpolation).astype(np.int32)
+            left, top = (corners.min(axis=0) - radius).tolist()
+            right, bottom = (corners.max(axis=0) + radius).tolist()
+        else:
+            if not self.particles:
+                return None
+            positions = [p.render_position(interpolation) for p in self.particles]
+            xs = [int(position.x) for position in positions]
+            ys = [int(position.y) for position in positions]
+            left, top = min(xs) - radius, min(ys) - radius
+            right, bottom = max(xs) + radius, max(ys) + radius
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def draw(self, surface, interpolation=1.0):
+        if self.engine is None:
+            for particle in self.particles:
+                particle.draw(surface, interpolation)
+            return
+
+        engine = self.engine
+        if not engine.count:
+            return
+        sprites = get_particle_sprites()
+        radius = PARTICLE_RADII[0]
+        n = engine.count
+        buckets = np.clip(engine.alphas() * sprites.buckets // 256, 0, sprites.buckets - 1).tolist()
+        corners = (engine.render_positions(interpolation).astype(np.int32) - radius).tolist()
+        table = sprites.sprites
+        surface.blits(
+            [
+                (table[(color, bucket, radius)], corner)
+                for color, bucket, corner in zip(engine.color[:n].tolist(), buckets, corners)
+            ],
+            doreturn=False,
+        )
@@ -0,0 +1,43 @@
+import math
+import pygame
+from settings import *
+from surfaces import create, finish
+
+_glows = {}
+
+
+def ring_glow(color, size, rings):
+    # rings is a tuple of (radius, alpha) pairs drawn largest first around the centre
+    key = (tuple(color[:3]), size, rings)
+    glow = _glows.get(key)
+    if glow is None:
+        glow = create((size, size))
+        center = glow.get_rect().center
+        for radius, alpha in rings:
+            pygame.draw.circle(glow, (*color[:3], alpha), center, radius)
+        glow = _glows[key] = finish(glow)
+    return glow
+
+
+def sun_glow(color, radius):
+    rings = tuple((int(radius * (2.6 - i * 0.7)), alpha) for i, alpha in enumerate((70, 45, 20)))
+    return ring_glow(color, radius * 4, rings)
+
+
+def disc(color, radius):
+    # A solid circle as a sprite, so it can be drawn like any other artwork
+    return ring_glow(color, radius * 2 + 1, ((radius, 255),))
+
+
+class GlowPulse:
+    # A sine-pulsing glow pre-rendered as a ring of frames indexed by phase
+    def __init__(self, color, alpha, base_radius, amplitude, speed, frames=32):
+        self.speed = speed
+        self.frames = []
+        for index in range(frames):
+            radius = int(base_radius + math.sin(2 * math.pi * index / frames) * amplitude)
+            self.frames.append(ring_glow(color, radius * 2, ((radius, alpha),)))
+
+    def frame(self, timer):
+        phase = (timer * self.speed) / (2 * math.pi)
+        return self.frames[int(phase * len(self.frames)) % len(self.frames)]
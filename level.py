@@ -1,117 +1,127 @@
+import random
+from collections import OrderedDict
 import pygame
+from collision import TileGrid
+from simulation import generate_layout
+from surfaces import create, finish
 from tile import Tile
 from settings import *
-import random
+
+CHUNK_WIDTH = CHUNK_TILES * TILE_SIZE
+
+
+class LevelChunk:
+    # A fixed-width vertical strip of the level with its own baked layer
+    def __init__(self, index):
+        self.index = index
+        self.tiles = []
+        self.flowers = []
+        self.layer = None
+        self.layer_pos = (0, 0)
+
+    def bounds(self):
+        rects = [tile.rect for tile in self.tiles]
+        for flower in self.flowers:
+            x, y = flower["stem_end"]
+            radius = flower["radius"]
+            rects.append(pygame.Rect(x - radius, y - radius, radius * 2 + 1, radius * 2 + 1))
+            rects.append(pygame.Rect(x - 1, y, 3, flower["stem_start"][1] - y + 1))
+        if not rects:
+            return None
+        return rects[0].unionall(rects[1:])
+
+    def bake(self):
+        bounds = self.bounds()
+        if bounds is None:
+            self.layer = create((0, 0))
+            self.layer_pos = (0, 0)
+            return self.layer
+
+        # Only the area actually covered by tiles and flowers is kept
+        layer = create(bounds.size)
+        self.draw_geometry(layer, (-bounds.x, -bounds.y))
+        layer = finish(layer)
+        self.layer = layer
+        self.layer_pos = bounds.topleft
+        return layer
+
+    def draw_geometry(self, surface, offset=(0, 0)):
+        ox, oy = offset
+        for tile in self.tiles:
+            surface.blit(tile.image, tile.rect.move(ox, oy))
+        for flower in self.flowers:
+            stem_start = (flower["stem_start"][0] + ox, flower["stem_start"][1] + oy)
+            stem_end = (flower["stem_end"][0] + ox, flower["stem_end"][1] + oy)
+            pygame.draw.line(surface, GROUND_SHADOW, stem_start, stem_end, 2)
+            pygame.draw.circle(surface, flower["color"], stem_end, flower["radius"])  # type: ignore[arg-type]
+
 
 class Level:
-    BLUEPRINTS = [
-        {
-            "columns": [(6, 1, 1), (9, 2, 1), (13, 1, 1)],
-            "platforms": [(4, 2, 3)],
-        },
-        {
-            "columns": [(5, 1, 1), (7, 1, 1), (9, 1, 1), (12, 2, 1)],
-            "platforms": [(8, 1, 4), (11, 1, 3)],
-        },
-        {
-            "columns": [(6, 2, 1), (10, 1, 1), (14, 1, 1)],
-            "platforms": [(7, 2, 3), (12, 1, 4)],
-        },
-        {
-            "columns": [(4, 1, 1), (8, 2, 1), (11, 1, 1), (13, 1, 1)],
-            "platforms": [(6, 1, 3), (9, 1, 4)],
-        },
-        {
-            "columns": [(5, 1, 1), (7, 2, 1), (10, 1, 1), (12, 2, 1)],
-            "platforms": [(6, 1, 3), (9, 2, 4)],
-        },
-        {
-            "columns": [(6, 1, 1), (8, 1, 1), (10, 2, 1), (13, 1, 1)],
-            "platforms": [(7, 1, 3), (11, 1, 4), (14, 1, 3)],
-        },
-    ]
-
-    def __init__(self, index, message):
+    def __init__(self, index, message, baked=True, layout=None):
         self.index = index
+        self.layout = layout  # A pre-generated LevelLayout (e.g. from a level pack) replaces the blueprint
+        self.width = WIDTH
         self.tiles = []
-        self._tile_positions = set()  # Track occupied tile coords to avoid duplicates
+        self.grid = TileGrid()  # Spatial index used for collision queries
         self.flowers = []
+        self.chunks = []
         self.message = message
+        # Static geometry is rendered per chunk into cached layers when baked
+        self.baked = baked
+        self._baked_chunks = OrderedDict()  # Chunk indices holding a layer, least recently drawn first
         self.generate_level()
 
     def _add_tile(self, x, y):
-        key = (x, y)
-        if key not in self._tile_positions:
-            self._tile_positions.add(key)
-            self.tiles.append(Tile(x, y))
+        # Layouts hold each position once already
+        tile = Tile(x, y, variant=self._variants.randrange(TILE_VARIANTS))
+        self.tiles.append(tile)
+        self.grid.add(tile)
+        self.chunks[x // CHUNK_WIDTH].tiles.append(tile)
 
     def generate_level(self):
         self.tiles = []
         self.flowers = []
-        self._tile_positions = set()
-
-        # Base ground layer
-        for x in range(0, WIDTH, TILE_SIZE):
-            self._add_tile(x, HEIGHT - TILE_SIZE)
-
-        blueprint = self.BLUEPRINTS[self.index % len(self.BLUEPRINTS)]
-
-        # Nudge the layout slightly to keep things fresh while remaining fair
-        lane_shift = min(self.index // len(self.BLUEPRINTS), 2)
-        max_tile_index = WIDTH // TILE_SIZE
-
-        def clamp_column_start(tile_x, width):
-            return min(tile_x, max_tile_index - width - 1)
-
-        # Place grounded columns (single-tile jumps and gentle doubles)
-        for tile_x, width, height in blueprint.get("columns", []):
-            start = clamp_column_start(tile_x + lane_shift, width)
-            for dx in range(width):
-                for level in range(height):
-                    x_pos = (start + dx) * TILE_SIZE
-                    y_pos = HEIGHT - TILE_SIZE * (2 + level)
-                    self._add_tile(x_pos, y_pos)
-
-        # Place floating platforms for optional shortcuts/rewards
-        for tile_x, width, level_height in blueprint.get("platforms", []):
-            start = clamp_column_start(tile_x + lane_shift, width)
-            y_pos = HEIGHT - TILE_SIZE * level_height
-            for dx in range(width):
-                x_pos = (start + dx) * TILE_SIZE
-                self._add_tile(x_pos, y_pos)
-
-        # Deterministic RNG so levels feel curated per index
-        rng = random.Random(self.index * 734)
-
-        # Gentle floating platforms for variation (deterministic)
-        num_extra = rng.randint(1, 2)
-        max_tiles_wide = WIDTH // TILE_SIZE
-        for _ in range(num_extra):
-            platform_width_tiles = rng.randint(1, 2)
-            start_tile_x = rng.randint(4, max(4, max_tiles_wide - (4 + platform_width_tiles)))
-            platform_x = start_tile_x * TILE_SIZE
-            platform_y = HEIGHT - TILE_SIZE * rng.randint(3, 4)
-            for t in range(platform_width_tiles):
-                self._add_tile(platform_x + t * TILE_SIZE, platform_y)
-
-        # Scatter flowers along ground tiles (deterministic)
-        ground_tiles = [tile for tile in self.tiles if tile.rect.bottom == HEIGHT]
-        for tile in ground_tiles:
-            if rng.random() < 0.22:
-                stem_height = rng.randint(12, 18)
-                flower_x = tile.rect.left + rng.randint(10, TILE_SIZE - 10)
-                flower_y = tile.rect.top - stem_height
-                color = rng.choice(FLOWER_COLORS)
-                self.flowers.append({
-                    "stem_start": (flower_x, tile.rect.top),
-                    "stem_end": (flower_x, flower_y),
-                    "color": color,
-                    "radius": rng.randint(4, 6),
-                })
-
-    def draw(self, surface):
-        for tile in self.tiles:
-            tile.draw(surface)
+        self.grid = TileGrid()
+        self._baked_chunks.clear()
+        # Tile looks come from the level index, so building levels never disturbs game_random
+        self._variants = random.Random(self.index * 7919 + 1)
+
+        layout = self.layout if self.layout is not None else generate_layout(self.index)
+        self.width = layout.width
+        self.chunks = [LevelChunk(index) for index in range(-(-layout.width // CHUNK_WIDTH))]
+        for x, y in layout.tiles:
+            self._add_tile(x, y)
+        self.flowers = layout.flowers
         for flower in self.flowers:
-            pygame.draw.line(surface, GROUND_SHADOW, flower["stem_start"], flower["stem_end"], 2)
-            pygame.draw.circle(surface, flower["color"], flower["stem_end"], flower["radius"])  # type: ignore[arg-type]
+            self.chunks[flower["stem_start"][0] // CHUNK_WIDTH].flowers.append(flower)
+
+    def visible_chunks(self, camera_x=0, view_width=WIDTH):
+        # Chunks are fixed width, so the visible ones are found by index, whatever the level's length
+        first = max(0, camera_x // CHUNK_WIDTH)
+        last = min(len(self.chunks) - 1, (camera_x + view_width - 1) // CHUNK_WIDTH)
+        return self.chunks[first:last + 1]
+
+    def bake(self, camera_x=0):
+        # Bake what is on screen at this camera position; other chunks bake when they scroll into view
+        for chunk in self.visible_chunks(camera_x):
+            self._chunk_layer(chunk)
+
+    def _chunk_layer(self, chunk):
+        if chunk.layer is None:
+            chunk.bake()
+        baked = self._baked_chunks
+        baked[chunk.index] = chunk
+        baked.move_to_end(chunk.index)
+        while len(baked) > CHUNK_CACHE_SIZE:
+            _, evicted = baked.popitem(last=False)
+            evicted.layer = None
+        return chunk.layer
+
+    def draw(self, surface, camera_x=0):
+        for chunk in self.visible_chunks(camera_x):
+            if not self.baked:
+                chunk.draw_geometry(surface, (-camera_x, 0))
+                continue
+            layer = self._chunk_layer(chunk)
+            x, y = chunk.layer_pos
+            surface.blit(layer, (x - camera_x, y))
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+
+from level import Level
+from settings import *
+from simulation import generate_layout
+
+
+class LevelManager:
+    # Builds levels on demand, keeps the last few, and prepares the next one a slice at a time
+    def __init__(self, messages, pack=None, retain=LEVEL_CACHE_SIZE):
+        self.messages = messages
+        self.pack = pack  # Endless mode: procedural layouts served after the story
+        self.retain = max(retain, 2)  # Room for the current level and the one being prefetched
+        self.levels = OrderedDict()
+        self._pending = None  # (index, generator) of the level being prefetched
+
+    def __len__(self):
+        return len(self.messages)
+
+    @property
+    def endless(self):
+        return bool(self.pack)
+
+    def __contains__(self, index):
+        return index in self.levels
+
+    def message(self, index):
+        if index < len(self.messages):
+            return self.messages[index]
+        return ENDLESS_MESSAGE.format(number=index - len(self.messages) + 1)
+
+    def layout(self, index):
+        if index < len(self.messages):
+            return generate_layout(index)
+        return self.pack[(index - len(self.messages)) % len(self.pack)]
+
+    def get(self, index):
+        level = self.levels.get(index)
+        if level is None:
+            if self._pending is not None and self._pending[0] == index:
+                # Asked for before the prefetch finished: finish it now
+                for _ in self._pending[1]:
+                    pass
+            else:
+                for _ in self._build(index):
+                    pass
+            level = self.levels[index]
+        self.levels.move_to_end(index)
+        return level
+
+    def prefetch(self, index):
+        # Returns the slices still needed to build the level, or None if there is nothing to do
+        if index in self.levels or not self.exists(index):
+            return None
+        if self._pending is None or self._pending[0] != index:
+            self._pending = (index, self._build(index))
+        return self._pending[1]
+
+    async def prepare(self, index, checkpoint):
+        # Background job: one slice per checkpoint
+        steps = self.prefetch(index)
+        if steps is None:
+            return
+        await checkpoint()
+        for _ in steps:
+            await checkpoint()
+
+    def exists(self, index):
+        return 0 <= index and (index < len(self.messages) or self.endless)
+
+    def _build(self, index):
+        try:
+            layout = self.layout(index)
+            yield
+            level = Level(index, self.message(index), layout=layout)
+            yield
+            level.bake()
+            self._store(index, level)
+        finally:
+            if self._pending is not None and self._pending[0] == index:
+                self._pending = None
+
+    def _store(self, index, level):
+        self.levels[index] = level
+        # The newest entries are the current level and the prefetched one
+        while len(self.levels) > self.retain:
+            self.levels.popitem(last=False)
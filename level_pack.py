@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzer import analyze_layout
+from assets import asset_path
+from settings import *
+from simulation import LevelLayout, generate_layout, sprite_size
+
+MAGIC = b"YMLP"
+VERSION = 4
+HEADER = struct.Struct("<4sHQI16s")  # magic, version, pack seed, level count, settings digest
+OFFSET = struct.Struct("<I")  # Start of each level record in the decompressed body
+COUNTS = struct.Struct("<HII")  # width in screens, tiles, flowers
+TILE = struct.Struct("<HB")  # column, row
+FLOWER = struct.Struct("<IHBBB")  # stem x, stem base y, stem height, color index, radius
+MAX_ATTEMPTS = 32  # Layouts tried per slot before leaving it out of the pack
+
+
+def settings_digest(size=None):
+    # Anything that changes what gets generated, or whether it can be completed, invalidates a pack
+    size = size if size is not None else sprite_size()
+    key = repr((VERSION, WIDTH, HEIGHT, TILE_SIZE, LEVEL_SCREENS, GRAVITY, MAX_FALL_SPEED, FLOWER_COLORS, size))
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+def pack_path(seed, count, directory=LEVEL_PACK_DIR, size=None):
+    # Relative directories live next to the code, like the other caches, wherever the game is run from
+    return os.path.join(asset_path(directory), f"{seed}-{count}-{settings_digest(size).hex()[:12]}.pack")
+
+
+def random_blueprint(rng):
+    # Same shape and ranges as the hand-written BLUEPRINTS
+    columns = []
+    tile_x = rng.randint(3, 5)
+    for _ in range(rng.randint(3, 4)):
+        columns.append((tile_x, rng.randint(1, 2), rng.choice((1, 1, 2))))
+        tile_x += rng.randint(2, 4)
+        if tile_x > 14:
+            break
+    platforms = [(rng.randint(4, 12), rng.randint(1, 2), rng.randint(3, 4)) for _ in range(rng.randint(1, 3))]
+    return {"columns": columns, "platforms": platforms}
+
+
+def generate_level(seed, index, size=None):
+    # Retries with fresh blueprints until the analyzer finds a way through; None if it never does
+    rng = random.Random(seed * 1_000_003 + index)
+    for _ in range(MAX_ATTEMPTS):
+        blueprints = [random_blueprint(rng) for _ in range(LEVEL_SCREENS)]
+        layout = generate_layout(index, blueprints, rng.getrandbits(32))
+        if analyze_layout(layout, size).solvable:  # An undecided search counts as a failure
+            return layout
+    print(f"No completable layout for level {index} of pack {seed} after {MAX_ATTEMPTS} attempts; leaving it out", flush=True)
+    return None
+
+
+def encode_level(layout):
+    record = bytearray(COUNTS.pack(layout.width // WIDTH, len(layout.tiles), len(layout.flowers)))
+    for x, y in layout.tiles:
+        record += TILE.pack(x // TILE_SIZE, y // TILE_SIZE)
+    for flower in layout.flowers:
+        x, base = flower["stem_start"]
+        record += FLOWER.pack(
+            x, base, base - flower["stem_end"][1], FLOWER_COLORS.index(flower["color"]), flower["radius"]
+        )
+    return bytes(record)
+
+
+def _build_record(job):
+    seed, index, size = job
+    layout = generate_level(seed, index, size)
+    return encode_level(layout) if layout is not None else None
+
+
+def generate_pack(seed, count, processes=None):
+    # Slots without a completable layout are dropped, so the pack may hold fewer than `count` levels
+    size = sprite_size()
+    jobs = [(seed, index, size) for index in range(count)]
+    if processes == 1:
+        records = [_build_record(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            records = list(executor.map(_build_record, jobs, chunksize=max(1, count // 64)))
+    return [record for record in records if record is not None]
+
+
+def write_pack(path, seed, records, size=None):
+    offsets = bytearray()
+    position = OFFSET.size * len(records)
+    for record in records:
+        offsets += OFFSET.pack(position)
+        position += len(record)
+    body = zlib.compress(bytes(offsets) + b"".join(records), 9)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, seed, len(records), settings_digest(size)))
+        handle.write(body)
+    os.replace(temporary, path)  # Readers never see a half-written pack
+
+
+class LevelPack:
+    # Levels are decoded from the in-memory body only when asked for
+    def __init__(self, seed, body, count):
+        self.seed = seed
+        self.body = body
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        body = self.body
+        (offset,) = OFFSET.unpack_from(body, index * OFFSET.size)
+        screens, tile_count, flower_count = COUNTS.unpack_from(body, offset)
+        offset += COUNTS.size
+
+        layout = LevelLayout(index, width=screens * WIDTH)
+        for column, row in TILE.iter_unpack(body[offset:offset + tile_count * TILE.size]):
+            layout.tiles.append((column * TILE_SIZE, row * TILE_SIZE))
+        offset += tile_count * TILE.size
+        for x, base, stem_height, color, radius in FLOWER.iter_unpack(body[offset:offset + flower_count * FLOWER.size]):
+            layout.flowers.append({
+                "stem_start": (x, base),
+                "stem_end": (x, base - stem_height),
+                "color": FLOWER_COLORS[color],
+                "radius": radius,
+            })
+        return layout
+
+
+def load_pack(path, size=None):
+    with open(path, "rb") as handle:
+        data = handle.read()
+    magic, version, seed, count, digest = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a level pack this version can read")
+    if digest != settings_digest(size):
+        raise ValueError(f"{path} was generated with different settings")
+    return LevelPack(seed, zlib.decompress(data[HEADER.size:]), count)
+
+
+def get_pack(seed=ENDLESS_PACK_SEED, count=LEVEL_PACK_SIZE, directory=LEVEL_PACK_DIR, processes=None):
+    # Read the cached pack for these settings, generating and saving it the first time
+    path = pack_path(seed, count, directory)
+    try:
+        return load_pack(path)
+    except (OSError, ValueError, zlib.error, struct.error):
+        pass
+    print(f"Generating {count} levels into {path}; this only happens once for these settings...", flush=True)
+    start = time.perf_counter()
+    records = generate_pack(seed, count, processes)
+    write_pack(path, seed, records)
+    print(f"generated {len(records)} of {count} levels in {time.perf_counter() - start:.2f}s")
+    return load_pack(path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a cached pack of procedural levels.")
+    parser.add_argument("--seed", type=int, default=ENDLESS_PACK_SEED)
+    parser.add_argument("--count", type=int, default=LEVEL_PACK_SIZE)
+    parser.add_argument("--directory", default=LEVEL_PACK_DIR)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="regenerate even if the pack is cached")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    path = pack_path(args.seed, args.count, args.directory)
+    if args.force or not os.path.exists(path):
+        start = time.perf_counter()
+        records = generate_pack(args.seed, args.count, args.processes)
+        write_pack(path, args.seed, records)
+        print(f"generated {len(records)} of {args.count} levels in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    pack = load_pack(path)
+    elapsed = time.perf_counter() - start
+    print(f"{path}: {os.path.getsize(path):,} bytes, {len(pack)} levels, loaded in {elapsed * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
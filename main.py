@@ -1,18 +1,35 @@
+import argparse
 import asyncio
-import math
-import random
+import gc
+import os
 import sys
+import time
 from dataclasses import dataclass
 
 import pygame
 import pygame.freetype
 from pygame.locals import *
 
+from camera import Camera
+from dirty_rects import DirtyRectRenderer
 from fireworks import Fireworks
-from level import Level
+from glow import GlowPulse
+from level_manager import LevelManager
+from level_pack import get_pack
 from player import Player
+from profiler import FrameProfiler
+from render_cache import PanelCache
+from scheduler import FrameScheduler
+from replay import InputRecorder, decode_events, decode_input, load_replay
+from rng import game_random, new_seed, seed as seed_random
+from scaling import ScaledCanvas, internal_size
 from settings import *
+from simulation import NO_INPUT, InputState, reached_goal
+from sky import Sky
 from sun import Sun
+from surfaces import create, finish
+from text_layout import layout_text
+from texture_canvas import TextureCanvas, texture_rendering_available
 
 
 LEVEL_COMPLETE_MESSAGES = [
@@ -21,24 +38,12 @@ LEVEL_COMPLETE_MESSAGES = [
     "Every finish line feels softer beside you.",
 ]
 
+# Text panels only change when their text, font or colour does
+panel_cache = PanelCache(maxsize=32)
+
 
 def wrap_text(font: pygame.freetype.Font, text: str, max_width: int) -> list[str]:
-    lines: list[str] = []
-    for paragraph in text.split("\n"):
-        words = paragraph.split()
-        if not words:
-            lines.append("")
-            continue
-        current_line = words[0]
-        for word in words[1:]:
-            candidate = f"{current_line} {word}"
-            if font.get_rect(candidate).width <= max_width:
-                current_line = candidate
-            else:
-                lines.append(current_line)
-                current_line = word
-        lines.append(current_line)
-    return lines
+    return list(layout_text(font, text, max_width).lines)
 
 
 @dataclass
@@ -55,65 +60,60 @@ class Cloud:
         self.width = 0
         self.height = 0
         self.x = 0.0
+        self.prev_x = 0.0
         self.y = 0.0
         self.speed = 0.0
-        self.reset(random.uniform(0, WIDTH))
+        self.reset(game_random.uniform(0, WIDTH))
 
     def reset(self, start_x: float):
-        self.width = random.randint(140, 220)
-        self.height = random.randint(60, 90)
-        self.speed = random.uniform(15, 40)
+        self.width = game_random.randint(140, 220)
+        self.height = game_random.randint(60, 90)
+        self.speed = game_random.uniform(15, 40)
         self.x = start_x
-        self.y = random.randint(40, HEIGHT // 2)
-        self.surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        lumps = random.randint(3, 5)
+        self.prev_x = start_x
+        self.y = game_random.randint(40, HEIGHT // 2)
+        surface = create((self.width, self.height))
+        lumps = game_random.randint(3, 5)
         for _ in range(lumps):
-            lump_width = random.randint(self.width // 3, self.width // 2)
-            lump_height = random.randint(self.height // 2, self.height)
+            lump_width = game_random.randint(self.width // 3, self.width // 2)
+            lump_height = game_random.randint(self.height // 2, self.height)
             rect = pygame.Rect(0, 0, lump_width, lump_height)
             rect.center = (
-                random.randint(rect.width // 2, self.width - rect.width // 2),
-                random.randint(rect.height // 2, self.height - rect.height // 2),
+                game_random.randint(rect.width // 2, self.width - rect.width // 2),
+                game_random.randint(rect.height // 2, self.height - rect.height // 2),
             )
-            pygame.draw.ellipse(self.surface, (255, 255, 255, 180), rect)
+            pygame.draw.ellipse(surface, (255, 255, 255, 180), rect)
+        self.surface = finish(surface)
 
     def update(self, dt: float):
+        self.prev_x = self.x
         self.x += self.speed * dt
         if self.x - self.width > WIDTH:
-            self.reset(-random.randint(80, 200))
+            self.reset(-game_random.randint(80, 200))
 
-    def draw(self, surface: pygame.Surface):
-        surface.blit(self.surface, (int(self.x), int(self.y)))
+    def _render_x(self, interpolation: float) -> int:
+        return int(self.prev_x + (self.x - self.prev_x) * interpolation)
+
+    def bounds(self, interpolation: float = 1.0) -> pygame.Rect:
+        return pygame.Rect(self._render_x(interpolation), int(self.y), self.width, self.height)
+
+    def draw(self, surface: pygame.Surface, interpolation: float = 1.0):
+        surface.blit(self.surface, (self._render_x(interpolation), int(self.y)))
 
 
 class Background:
     def __init__(self):
-        self.day_surface = self._create_gradient(SKY_BLUE, HORIZON_BLUE)
-        self.dusk_surface = self._create_gradient(TWILIGHT_TOP, TWILIGHT_BOTTOM)
+        self.sky = Sky()
         self.clouds = [Cloud() for _ in range(5)]
 
-    def _create_gradient(self, top_color, bottom_color):
-        surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        for y in range(HEIGHT):
-            ratio = y / HEIGHT
-            r = int(top_color[0] * (1 - ratio) + bottom_color[0] * ratio)
-            g = int(top_color[1] * (1 - ratio) + bottom_color[1] * ratio)
-            b = int(top_color[2] * (1 - ratio) + bottom_color[2] * ratio)
-            pygame.draw.line(surface, (r, g, b), (0, y), (WIDTH, y))
-        return surface
-
     def update(self, dt: float):
         for cloud in self.clouds:
             cloud.update(dt)
 
-    def draw(self, surface: pygame.Surface, progress: float):
-        surface.blit(self.day_surface, (0, 0))
-        dusk_alpha = max(0, min(255, int(200 * progress)))
-        if dusk_alpha:
-            self.dusk_surface.set_alpha(dusk_alpha)
-            surface.blit(self.dusk_surface, (0, 0))
+    def draw(self, surface: pygame.Surface, progress: float, interpolation: float = 1.0):
+        self.sky.draw(surface, progress)
         for cloud in self.clouds:
-            cloud.draw(surface)
+            cloud.draw(surface, interpolation)
 
 
 class MessageOverlay:
@@ -158,32 +158,54 @@ class MessageOverlay:
             if self.queue:
                 self.current = self.queue.pop(0)
 
-    def draw(self, surface: pygame.Surface):
+    def _panel(self) -> pygame.Surface | None:
         if self.current is None:
-            return
+            return None
 
         font = self.current.font
         text = self.current.text
         if not text:
-            return
+            return None
 
-        wrapped = wrap_text(font, str(text), 560)
-        rendered = [font.render(line, self.current.color)[0] for line in wrapped]
-        width = max(line.get_width() for line in rendered)
-        height = sum(line.get_height() for line in rendered) + 10 * (len(rendered) - 1)
+        return overlay_panel(font, str(text), self.current.color)
 
-        panel = pygame.Surface((width + 48, height + 40), pygame.SRCALPHA)
-        pygame.draw.rect(panel, (0, 0, 0, 160), panel.get_rect(), border_radius=18)
-        y = 20
-        for line in rendered:
-            x = (panel.get_width() - line.get_width()) // 2
-            panel.blit(line, (x, y))
-            y += line.get_height() + 10
+    def bounds(self) -> pygame.Rect | None:
+        panel = self._panel()
+        if panel is None:
+            return None
+        return panel.get_rect(center=(WIDTH // 2, int(HEIGHT * 0.22)))
 
+    def draw(self, surface: pygame.Surface):
+        panel = self._panel()
+        if panel is None:
+            return
         panel_rect = panel.get_rect(center=(WIDTH // 2, int(HEIGHT * 0.22)))
         surface.blit(panel, panel_rect)
 
 
+def overlay_panel(font: pygame.freetype.Font, text: str, color) -> pygame.Surface:
+    return panel_cache.get(
+        ("overlay", text, font, color, 560),
+        lambda: build_overlay_panel(font, text, color, 560),
+    )
+
+
+def build_overlay_panel(font: pygame.freetype.Font, text: str, color, max_width: int) -> pygame.Surface:
+    layout = layout_text(font, text, max_width)
+    rendered = [font.render(line, color)[0] for line in layout.lines]
+    width = max(line.get_width() for line in rendered)
+    height = sum(line.get_height() for line in rendered) + 10 * (len(rendered) - 1)
+
+    panel = create((width + 48, height + 40))
+    pygame.draw.rect(panel, (0, 0, 0, 160), panel.get_rect(), border_radius=18)
+    y = 20
+    for line in rendered:
+        x = (panel.get_width() - line.get_width()) // 2
+        panel.blit(line, (x, y))
+        y += line.get_height() + 10
+    return finish(panel)
+
+
 class PointsPrompt:
     def __init__(self, message_font: pygame.freetype.Font, hint_font: pygame.freetype.Font):
         self.message_font = message_font
@@ -236,13 +258,26 @@ class PointsPrompt:
         self.choice = None
         return choice
 
+    def _panel(self) -> pygame.Surface:
+        return panel_cache.get(("prompt", self.message_font, self.hint_font), self._build_panel)
+
+    def bounds(self) -> pygame.Rect | None:
+        if not self.active or self.finished:
+            return None
+        return self._panel().get_rect(center=(WIDTH // 2, HEIGHT - 120))
+
     def draw(self, surface: pygame.Surface):
         if not self.active or self.finished:
             return
 
+        panel = self._panel()
+        panel_rect = panel.get_rect(center=(WIDTH // 2, HEIGHT - 120))
+        surface.blit(panel, panel_rect)
+
+    def _build_panel(self) -> pygame.Surface:
         width = 500
         height = 140
-        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel = create((width, height))
         pygame.draw.rect(panel, (0, 0, 0, 160), panel.get_rect(), border_radius=18)
 
         main_text, _ = self.message_font.render("Would you like points?", WHITE)
@@ -261,187 +296,508 @@ class PointsPrompt:
             pygame.draw.circle(panel, (36, 42, 68, 230), (center_x, key_y), 20, width=2)
             glyph, _ = self.hint_font.render(label, (36, 42, 68))
             panel.blit(glyph, (center_x - glyph.get_width() // 2, key_y - glyph.get_height() // 2))
-
-        panel_rect = panel.get_rect(center=(WIDTH // 2, HEIGHT - 120))
-        surface.blit(panel, panel_rect)
+        return finish(panel)
 
 
 class GoalMarker:
-    def __init__(self):
-        self.rect = pygame.Rect(WIDTH - TILE_SIZE, HEIGHT - TILE_SIZE * 2, TILE_SIZE // 2, TILE_SIZE * 2 - 12)
+    def __init__(self, world_width: int = WIDTH):
+        self.rect = pygame.Rect(0, HEIGHT - TILE_SIZE * 2, TILE_SIZE // 2, TILE_SIZE * 2 - 12)
+        self.place(world_width)
         self.timer = 0.0
+        self.prev_timer = 0.0
+        self.glow = GlowPulse(WHITE, 70, base_radius=28, amplitude=6, speed=4)
+        self.body = self._build_body()
+
+    def place(self, world_width: int):
+        # The goal sits at the right end of the level
+        self.rect.x = world_width - TILE_SIZE
 
     def update(self, dt: float):
+        self.prev_timer = self.timer
         self.timer += dt
 
-    def draw(self, surface: pygame.Surface):
-        glow_radius = int(28 + math.sin(self.timer * 4) * 6)
-        glow_surface = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(glow_surface, (255, 255, 255, 70), (glow_radius, glow_radius), glow_radius)
-        glow_pos = (self.rect.centerx - glow_radius, self.rect.centery - glow_radius)
-        surface.blit(glow_surface, glow_pos, special_flags=pygame.BLEND_PREMULTIPLIED)
+    def glow_frame(self, interpolation: float = 1.0) -> pygame.Surface:
+        return self.glow.frame(self.prev_timer + (self.timer - self.prev_timer) * interpolation)
 
-        pygame.draw.rect(surface, (255, 255, 255), self.rect, border_radius=10)
-        inner = self.rect.inflate(-6, -6)
-        pygame.draw.rect(surface, (255, 215, 120), inner, border_radius=8)
+    def _glow_rect(self, glow_surface: pygame.Surface, rect: pygame.Rect) -> pygame.Rect:
+        return glow_surface.get_rect(center=rect.center)
+
+    def bounds(self, interpolation: float = 1.0, camera_x: int = 0) -> pygame.Rect:
+        rect = self.rect.move(-camera_x, 0)
+        return self._glow_rect(self.glow_frame(interpolation), rect).union(rect)
+
+    def draw(self, surface: pygame.Surface, interpolation: float = 1.0, camera_x: int = 0):
+        rect = self.rect.move(-camera_x, 0)
+        glow_surface = self.glow_frame(interpolation)
+        surface.blit(glow_surface, self._glow_rect(glow_surface, rect), special_flags=pygame.BLEND_PREMULTIPLIED)
+
+        surface.blit(self.body, rect)
+
+    def _build_body(self) -> pygame.Surface:
+        body = create(self.rect.size)
+        rect = body.get_rect()
+        pygame.draw.rect(body, (255, 255, 255), rect, border_radius=10)
+        pygame.draw.rect(body, (255, 215, 120), rect.inflate(-6, -6), border_radius=8)
+        return finish(body)
+
+
+def story_panel(font: pygame.freetype.Font, text: str) -> pygame.Surface:
+    return panel_cache.get(("story", text, font, 420), lambda: build_story_panel(font, text, 420))
+
+
+def story_panel_rect(font: pygame.freetype.Font, text: str) -> pygame.Rect | None:
+    if not text:
+        return None
+    return story_panel(font, text).get_rect(topleft=(28, 96))
 
 
 def draw_story_panel(surface: pygame.Surface, font: pygame.freetype.Font, text: str):
     if not text:
         return
-    lines = wrap_text(font, text, 420)
-    rendered = [font.render(line, (36, 42, 68))[0] for line in lines]
+    surface.blit(story_panel(font, text), (28, 96))
+
+
+def build_story_panel(font: pygame.freetype.Font, text: str, max_width: int) -> pygame.Surface:
+    layout = layout_text(font, text, max_width)
+    rendered = [font.render(line, (36, 42, 68))[0] for line in layout.lines]
     width = max(line.get_width() for line in rendered)
     height = sum(line.get_height() for line in rendered) + 8 * (len(rendered) - 1)
-    panel = pygame.Surface((width + 44, height + 36), pygame.SRCALPHA)
+    panel = create((width + 44, height + 36))
     pygame.draw.rect(panel, (255, 255, 255, 205), panel.get_rect(), border_radius=18)
     pygame.draw.rect(panel, (0, 0, 0, 35), panel.get_rect(), width=2, border_radius=18)
     y = 18
     for line in rendered:
         panel.blit(line, (22, y))
         y += line.get_height() + 8
-    surface.blit(panel, (28, 96))
+    return finish(panel)
 
 
-def draw_score(surface: pygame.Surface, font: pygame.freetype.Font, score: int):
-    panel = pygame.Surface((170, 56), pygame.SRCALPHA)
-    pygame.draw.rect(panel, (0, 0, 0, 130), panel.get_rect(), border_radius=14)
-    font.render_to(panel, (20, 18), f"Score: {score}", WHITE)
-    panel_rect = panel.get_rect()
+def score_panel(font: pygame.freetype.Font, score: int) -> pygame.Surface:
+    return panel_cache.get(("score", score, font), lambda: build_score_panel(font, score))
+
+
+def score_panel_rect(font: pygame.freetype.Font, score: int) -> pygame.Rect:
+    panel_rect = score_panel(font, score).get_rect()
     panel_rect.topright = (WIDTH - 24, 24)
-    surface.blit(panel, panel_rect)
+    return panel_rect
 
 
-async def game_loop():
-    pygame.init()
-    pygame.freetype.init()
+def draw_score(surface: pygame.Surface, font: pygame.freetype.Font, score: int):
+    surface.blit(score_panel(font, score), score_panel_rect(font, score))
 
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("You and Me")
-    clock = pygame.time.Clock()
 
-    fonts = {
+def build_score_panel(font: pygame.freetype.Font, score: int) -> pygame.Surface:
+    panel = create((170, 56))
+    pygame.draw.rect(panel, (0, 0, 0, 130), panel.get_rect(), border_radius=14)
+    font.render_to(panel, (20, 18), f"Score: {score}", WHITE)
+    return finish(panel)
+
+
+def load_fonts() -> dict[str, pygame.freetype.Font]:
+    return {
         "title": pygame.freetype.Font(None, 54),
         "story": pygame.freetype.Font(None, 30),
         "hud": pygame.freetype.Font(None, 28),
         "prompt": pygame.freetype.Font(None, 22),
     }
 
-    background = Background()
-    sun = Sun()
-    fireworks = Fireworks()
-    goal_marker = GoalMarker()
-
-    # Build levels with index + message, matching Level(index, message)
-    levels = [Level(index=i, message=msg) for i, msg in enumerate(MESSAGES)]
-    current_level_index = 0
-    current_level = levels[current_level_index]
-
-    player = Player(100, HEIGHT - TILE_SIZE * 2)
 
-    overlay = MessageOverlay()
-    overlay.show(current_level.message, 4.0, fonts["story"], color=(36, 42, 68))
-
-    points_prompt = PointsPrompt(fonts["story"], fonts["prompt"])
-    score = 0
-    level_transition = False
-    end_sequence = False
-    end_timer = 0.0
-
-    # trigger points prompt on whichever level mentions "points" (defaults to last level)
-    points_prompt_level = next(
-        (i for i, message in enumerate(MESSAGES) if "points" in message.lower()),
-        len(levels) - 1,
-    )
-
-    running = True
-    while running:
-        dt = min(clock.tick(FRAMERATE_LIMIT) / 1000.0, 0.06)
+class Game:
+    def __init__(
+        self,
+        fonts: dict[str, pygame.freetype.Font],
+        profiler: FrameProfiler | None = None,
+        pack=None,
+        scheduler: FrameScheduler | None = None,
+    ):
+        self.fonts = fonts
+        # Preparation work runs here in spare frame time; game_loop drives it
+        self.scheduler = scheduler if scheduler is not None else FrameScheduler()
+        self.profiler = profiler if profiler is not None else FrameProfiler(enabled=False)
+        self.background = Background()
+        self.sun = Sun()
+        self.fireworks = Fireworks()
+        self.goal_marker = GoalMarker()
+
+        # Only the current level is built up front; the next one is prepared during play
+        self.levels = LevelManager(MESSAGES, pack)
+        self.current_level_index = 0
+        self.current_level = self.levels.get(self.current_level_index)
+
+        self.player = Player(100, HEIGHT - TILE_SIZE * 2)
+        self.camera = Camera()
+        self._enter_level()
+
+        self.overlay = MessageOverlay()
+        self.overlay.show(self.current_level.message, 4.0, fonts["story"], color=(36, 42, 68))
+
+        self.points_prompt = PointsPrompt(fonts["story"], fonts["prompt"])
+        self.score = 0
+        self.level_transition = False
+        self.end_sequence = False
+        self.end_timer = 0.0
+        self.running = True
+        self.interpolation = 1.0  # Fraction of a tick between the last two simulated states
+
+        # trigger points prompt on whichever level mentions "points" (defaults to last level)
+        self.points_prompt_level = next(
+            (i for i, message in enumerate(MESSAGES) if "points" in message.lower()),
+            len(self.levels) - 1,
+        )
 
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                running = False
-            elif event.type == KEYDOWN and event.key == K_ESCAPE:
-                running = False
+        self._sky_upcoming = None
+        self.scheduler.spawn(self._warm_sky)
+        self.scheduler.spawn(self._prepare_level, self.current_level_index + 1)
 
-            points_prompt.handle_event(event)
+    @property
+    def progress(self) -> float:
+        return min(
+            (self.current_level_index + self.player.rect.centerx / self.current_level.width) / max(len(self.levels), 1),
+            1.0,
+        )
 
-        points_prompt.update(dt)
-        overlay.update(dt)
+    @property
+    def goal_visible(self) -> bool:
+        return not self.level_transition and not self.end_sequence
 
-        player.set_controls_enabled(not level_transition and not end_sequence)
-        player.update(current_level.tiles, dt)
+    def handle_event(self, event: pygame.event.Event):
+        if event.type == QUIT:
+            self.running = False
+        elif event.type == KEYDOWN and event.key == K_ESCAPE:
+            self.running = False
 
-        fireworks.update(dt)
+        self.points_prompt.handle_event(event)
+        self.profiler.handle_event(event)
 
-        if not level_transition and not end_sequence:
-            if player.rect.centerx >= WIDTH - TILE_SIZE and player.vel_x >= 0:
-                level_transition = True
-                fireworks.start()
+    def update(self, dt: float):
+        stage = self.profiler.stage
+        with stage("overlays"):
+            self.points_prompt.update(dt)
+            self.overlay.update(dt)
+
+        with stage("player"):
+            self.player.set_controls_enabled(not self.level_transition and not self.end_sequence)
+            self.player.update(self.current_level.grid, dt)
+            self.camera.follow(self.player.pos_x + self.player.rect.width / 2)
+
+        with stage("fireworks"):
+            self.fireworks.update(dt)
+
+        with stage("progression"):
+            self._update_progression(dt)
+
+        with stage("scenery"):
+            self.background.update(dt)
+            self.sun.update(self.progress)
+            # The next sky keyframe is built in spare time, so draw never pays for it
+            upcoming = self.background.sky.upcoming(self.progress)
+            if upcoming is not None and upcoming != self._sky_upcoming:
+                self._sky_upcoming = upcoming
+                self.scheduler.spawn(self._prepare_sky, upcoming)
+            if self.goal_visible:
+                self.goal_marker.update(dt)
+
+    def _update_progression(self, dt: float):
+        fonts = self.fonts
+        player = self.player
+
+        if not self.level_transition and not self.end_sequence:
+            if reached_goal(player):
+                self.level_transition = True
+                self.fireworks.start()
                 player.vel_x = 0
-                player.pos_x = min(player.pos_x, WIDTH - player.rect.width - 10)
+                player.pos_x = min(player.pos_x, self.current_level.width - player.rect.width - 10)
                 player.rect.x = int(player.pos_x)
-                score += 100
-                overlay.show(random.choice(LEVEL_COMPLETE_MESSAGES), 3.0, fonts["title"])
-
-        if level_transition and not fireworks.active:
-            current_level_index += 1
-            if current_level_index >= len(levels):
-                level_transition = False
-                end_sequence = True
-                end_timer = 5.0
-                overlay.show("Thank you for staying until the twilight.", None, fonts["title"])
-                points_prompt.deactivate()
+                self.score += 100
+                self.overlay.show(game_random.choice(LEVEL_COMPLETE_MESSAGES), 3.0, fonts["title"])
+
+        if self.level_transition and not self.fireworks.active:
+            self.current_level_index += 1
+            if not self.levels.exists(self.current_level_index):
+                self.level_transition = False
+                self.end_sequence = True
+                self.end_timer = 5.0
+                self.overlay.show("Thank you for staying until the twilight.", None, fonts["title"])
+                self.points_prompt.deactivate()
             else:
-                current_level = levels[current_level_index]
+                self.current_level = self.levels.get(self.current_level_index)
+                self.scheduler.spawn(self._prepare_level, self.current_level_index + 1)
                 player.reset(100, HEIGHT - TILE_SIZE * 2)
-                level_transition = False
+                self._enter_level()
+                self.level_transition = False
 
-                if current_level_index == points_prompt_level:
-                    points_prompt.activate(delay=1.5)
+                if self.current_level_index == self.points_prompt_level:
+                    self.points_prompt.activate(delay=1.5)
                 else:
-                    points_prompt.reset()
+                    self.points_prompt.reset()
 
-                overlay.show(current_level.message, 4.0, fonts["story"], color=(36, 42, 68))
+                self.overlay.show(self.current_level.message, 4.0, fonts["story"], color=(36, 42, 68))
 
-        choice = points_prompt.consume_choice()
+        choice = self.points_prompt.consume_choice()
         if choice is not None:
             if choice:
-                score += 250
-                overlay.show("I'll keep those points close.", 3.2, fonts["title"])
+                self.score += 250
+                self.overlay.show("I'll keep those points close.", 3.2, fonts["title"])
             else:
-                overlay.show("The walk alone is worth more.", 3.2, fonts["story"], color=(36, 42, 68))
-
-        if end_sequence:
-            end_timer -= dt
-            if end_timer <= 0:
-                running = False
+                self.overlay.show("The walk alone is worth more.", 3.2, fonts["story"], color=(36, 42, 68))
+
+        if self.end_sequence:
+            self.end_timer -= dt
+            if self.end_timer <= 0:
+                self.running = False
+
+    def _enter_level(self):
+        # Point the player, camera and goal at the current level's extent
+        width = self.current_level.width
+        self.player.world_width = width
+        self.camera.reset(width, self.player.pos_x + self.player.rect.width / 2)
+        self.goal_marker.place(width)
+
+    async def _prepare_level(self, index: int):
+        # Build and bake the next level, then render the text it will show
+        checkpoint = self.scheduler.checkpoint
+        await self.levels.prepare(index, checkpoint)
+        if not self.levels.exists(index):
+            return
+        message = self.levels.message(index)
+        await checkpoint()
+        story_panel(self.fonts["story"], message)
+        await checkpoint()
+        overlay_panel(self.fonts["story"], message, (36, 42, 68))
+
+    async def _warm_sky(self):
+        sky = self.background.sky
+        for index in range(sky.keyframes):
+            await self.scheduler.checkpoint()
+            sky.column(index)
+        sky.store()
+
+    async def _prepare_sky(self, index: int):
+        await self.scheduler.checkpoint()
+        self.background.sky.prepare(index)
 
-        progress = min((current_level_index + player.rect.centerx / WIDTH) / max(len(levels), 1), 1.0)
-        background.update(dt)
-        background.draw(screen, progress)
-        sun.update(progress)
-        sun.draw(screen)
+    def draw(self, surface: pygame.Surface):
+        stage = self.profiler.stage
+        interpolation = self.interpolation
+        camera_x = self.camera.offset(interpolation)
+        with stage("draw.sky"):
+            self.background.draw(surface, self.progress, interpolation)
+        with stage("draw.sun"):
+            self.sun.draw(surface)
+
+        with stage("draw.level"):
+            self.current_level.draw(surface, camera_x)
+        with stage("draw.goal"):
+            if self.goal_visible:
+                self.goal_marker.draw(surface, interpolation, camera_x)
+
+        with stage("draw.player"):
+            self.player.draw(surface, interpolation, camera_x)
+        with stage("draw.fireworks"):
+            self.fireworks.draw(surface, interpolation)
+
+        with stage("draw.panels"):
+            draw_story_panel(surface, self.fonts["story"], self.current_level.message)
+            self.points_prompt.draw(surface)
+            self.overlay.draw(surface)
+            draw_score(surface, self.fonts["hud"], self.score)
+
+        self.profiler.draw(surface)
+
+    def scene_key(self):
+        # Anything that changes the whole frame rather than a region of it
+        # Scrolling moves the whole level, so a new camera offset redraws everything
+        return (
+            self.current_level_index,
+            self.background.sky.keyframe(self.progress),
+            self.camera.offset(self.interpolation),
+        )
 
-        current_level.draw(screen)
-        if not level_transition and not end_sequence:
-            goal_marker.update(dt)
-            goal_marker.draw(screen)
+    def regions(self):
+        # (name, bounds, state) for everything that can change between frames
+        interpolation = self.interpolation
+        camera_x = self.camera.offset(interpolation)
+        yield "sun", self.sun.bounds(), None
+        for index, cloud in enumerate(self.background.clouds):
+            yield ("cloud", index), cloud.bounds(interpolation), id(cloud.surface)
+        if self.goal_visible:
+            yield "goal", self.goal_marker.bounds(interpolation, camera_x), id(self.goal_marker.glow_frame(interpolation))
+        yield "player", self.player.bounds(interpolation, camera_x), id(self.player.image)
+        if self.fireworks.particle_count:
+            yield "fireworks", self.fireworks.bounds(interpolation), (self.fireworks.timer, interpolation)
+        yield "story", story_panel_rect(self.fonts["story"], self.current_level.message), self.current_level.message
+        yield "prompt", self.points_prompt.bounds(), None
+        current = self.overlay.current
+        yield "overlay", self.overlay.bounds(), None if current is None else (current.text, current.color)
+        yield "score", score_panel_rect(self.fonts["hud"], self.score), self.score
+        if self.profiler.visible:
+            yield "profiler", self.profiler.bounds(HEIGHT), self.profiler.frame
+
+
+async def game_loop(
+    record_path: str | None = None,
+    replay_path: str | None = None,
+    fast: bool = False,
+    endless: bool = False,
+    backend: str = RENDER_BACKEND,
+    render_scale: float = RENDER_SCALE,
+    fullscreen: bool = FULLSCREEN,
+):
+    replay = load_replay(replay_path) if replay_path else None
+    if replay is not None:
+        seed, fixed_timestep, tick_rate = replay.seed, replay.fixed_timestep, replay.tick_rate
+    else:
+        seed, fixed_timestep, tick_rate = new_seed(), FIXED_TIMESTEP, SIMULATION_TICK_RATE
+    seed_random(seed)
+    fast = fast and replay is not None
+
+    # A cold pack cache means generating every level, so do it before a window sits there blank
+    pack = get_pack() if endless else None
 
-        player.draw(screen)
-        fireworks.draw(screen)
+    pygame.init()
+    pygame.freetype.init()
 
-        draw_story_panel(screen, fonts["story"], current_level.message)
-        points_prompt.draw(screen)
-        overlay.draw(screen)
-        draw_score(screen, fonts["hud"], score)
+    if backend == "texture" and not texture_rendering_available():
+        print("Texture rendering needs pygame's SDL2 video module; drawing on surfaces instead")
+        backend = "surface"
+    # The game draws at WIDTH x HEIGHT scaled to the internal size; SDL stretches that to a full screen
+    size = internal_size(render_scale)
+    screen = canvas = None
+    if backend == "texture":
+        # The renderer owns the window, so there is no display surface; everything is drawn as textures
+        canvas = TextureCanvas("You and Me", size, fullscreen=fullscreen)
+    else:
+        screen = pygame.display.set_mode(size, pygame.SCALED | pygame.FULLSCREEN if fullscreen else 0)
+        pygame.display.set_caption("You and Me")
+    surface = canvas if canvas is not None else screen
+    if render_scale != 1:
+        surface = ScaledCanvas(surface, render_scale)
+    clock = pygame.time.Clock()
 
-        pygame.display.flip()
-        await asyncio.sleep(0)
+    profiler = FrameProfiler()
+    scheduler = FrameScheduler()
+    game = Game(load_fonts(), profiler, pack=pack, scheduler=scheduler)
+    if DIRTY_RECT_RENDERING and surface is not screen:
+        print("Dirty-rect rendering needs the surface backend at scale 1; redrawing every frame instead")
+    renderer = DirtyRectRenderer(screen) if DIRTY_RECT_RENDERING and surface is screen else None
+    # Startup objects live for the whole run; keeping them out of collections avoids long GC pauses mid-frame
+    gc.freeze()
+
+    # The player reads exactly the input that is recorded or replayed for the frame
+    frame_input = NO_INPUT
+    game.player.key_source = lambda: frame_input
+    recorder = InputRecorder(record_path, seed, fixed_timestep, tick_rate) if record_path else None
+    replay_frames = iter(replay.frames) if replay is not None else None
+    started = time.perf_counter()
+    frames = 0
+
+    tick = 1.0 / tick_rate
+    accumulator = 0.0
+
+    while game.running:
+        if replay_frames is not None:
+            entry = next(replay_frames, None)
+            if entry is None:
+                break
+            frame_ms, flags = entry
+            if not fast:
+                clock.tick(1000 / max(frame_ms, 1))
+            frame_input = decode_input(flags)
+            # Window events still count (quit, profiler keys) but answers only come from the log
+            events = [event for event in pygame.event.get() if event.type != KEYDOWN or event.key not in (K_y, K_n)]
+            events += decode_events(flags)
+        else:
+            frame_ms = clock.tick(FRAMERATE_LIMIT)
+            events = pygame.event.get()
+            frame_input = InputState.from_keys(pygame.key.get_pressed())
+            if recorder is not None:
+                recorder.record(frame_ms, frame_input, events)
+        frame_time = frame_ms / 1000.0
+        frames += 1
+        frame_start = time.perf_counter()
+        profiler.begin_frame()
+
+        with profiler.stage("events"):
+            for event in events:
+                game.handle_event(event)
+
+        if fixed_timestep:
+            # Simulate in constant ticks; a slow frame runs extra ticks instead of stretching one
+            accumulator += min(frame_time, MAX_FRAME_TIME)
+            while accumulator >= tick and game.running:
+                game.update(tick)
+                accumulator -= tick
+            game.interpolation = accumulator / tick
+        else:
+            game.update(min(frame_time, 0.06))
+
+        if not fast:
+            if canvas is not None:
+                canvas.clear()
+                game.draw(surface)
+                with profiler.stage("present"):
+                    canvas.present()
+            elif renderer is not None:
+                renderer.render(game)
+            else:
+                game.draw(surface)
+                with profiler.stage("present"):
+                    pygame.display.flip()
+        # Background jobs get whatever is left of this frame's slot
+        with profiler.stage("jobs"):
+            await scheduler.run(frame_start + 1 / FRAMERATE_LIMIT - SCHEDULER_MARGIN)
+        profiler.end_frame()
+
+    # Preparation still parked for a later frame is no longer needed
+    scheduler.cancel()
+    if recorder is not None:
+        recorder.close()
+    if replay is not None:
+        elapsed = time.perf_counter() - started
+        print(
+            f"Replayed {frames} frames in {elapsed:.2f} s ({frames / max(elapsed, 1e-9):.0f} frames/s): "
+            f"level {game.current_level_index}, score {game.score}, "
+            f"player at ({game.player.pos_x:.2f}, {game.player.pos_y:.2f})"
+        )
 
     pygame.quit()
     sys.exit()
 
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="You and Me")
+    parser.add_argument("--record", metavar="FILE", help="record every frame's input to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recording instead of reading the keyboard")
+    parser.add_argument("--fast", action="store_true", help="with --replay, run as fast as possible without rendering")
+    parser.add_argument("--endless", action="store_true", help="keep going with procedural levels after the story")
+    parser.add_argument(
+        "--backend",
+        choices=["surface", "texture"],
+        default=RENDER_BACKEND,
+        help="draw with CPU surface blits or with SDL's (possibly GPU-accelerated) texture renderer",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=RENDER_SCALE, help="internal resolution as a multiple of the game's 800x600"
+    )
+    parser.add_argument("--fullscreen", action="store_true", default=FULLSCREEN, help="stretch the game over the display")
+    args = parser.parse_args(argv)
+    if not args.scale > 0:
+        parser.error("--scale must be greater than 0")
+    return args
+
+
 if __name__ == "__main__":
-    asyncio.run(game_loop())
+    args = parse_args()
+    if args.fast and args.replay:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    asyncio.run(
+        game_loop(
+            record_path=args.record,
+            replay_path=args.replay,
+            fast=args.fast,
+            endless=args.endless,
+            backend=args.backend,
+            render_scale=args.scale,
+            fullscreen=args.fullscreen,
+        )
+    )
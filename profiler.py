@@ -0,0 +1,203 @@
+import json
+import time
+
+import pygame
+import pygame.freetype
+
+from surfaces import create
+
+STAGE_COLORS = [
+    (239, 83, 80),
+    (255, 167, 38),
+    (255, 238, 88),
+    (102, 187, 106),
+    (38, 198, 218),
+    (66, 165, 245),
+    (126, 87, 194),
+    (236, 64, 122),
+    (141, 110, 99),
+    (189, 189, 189),
+]
+
+
+class _Stage:
+    # Reused context manager so timing a stage allocates nothing per frame
+    __slots__ = ("profiler", "index", "start")
+
+    def __init__(self, profiler, index):
+        self.profiler = profiler
+        self.index = index
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        profiler = self.profiler
+        if profiler.enabled:
+            profiler._record(self.index, self.start, end)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, capacity=240, events_per_frame=48, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.visible = False
+        self.frame = 0
+        self.names: list[str] = []
+        self._stages: dict[str, _Stage] = {}
+        self._durations: list[list[float]] = []  # [stage][slot], summed when a stage runs several times
+        self._frame_start = [0.0] * capacity
+        self._frame_time = [0.0] * capacity
+        self._current_start = None
+        self._origin = time.perf_counter()
+
+        # Flat ring of (stage, start, end) occurrences for trace export
+        self._event_capacity = capacity * events_per_frame
+        self._event_stage = [0] * self._event_capacity
+        self._event_start = [0.0] * self._event_capacity
+        self._event_end = [0.0] * self._event_capacity
+        self._event_count = 0
+        self._font = None
+
+    def stage(self, name: str) -> _Stage:
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = _Stage(self, len(self.names))
+            self._stages[name] = stage
+            self.names.append(name)
+            self._durations.append([0.0] * self.capacity)
+        return stage
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        slot = self.frame % self.capacity
+        if self._current_start is not None:
+            previous = (self.frame - 1) % self.capacity
+            self._frame_time[previous] = now - self._current_start
+        self._current_start = now
+        self._frame_start[slot] = now
+        self._frame_time[slot] = 0.0
+        for durations in self._durations:
+            durations[slot] = 0.0
+
+    def end_frame(self):
+        if self.enabled:
+            self.frame += 1
+
+    def _record(self, index, start, end):
+        self._durations[index][self.frame % self.capacity] += end - start
+        slot = self._event_count % self._event_capacity
+        self._event_stage[slot] = index
+        self._event_start[slot] = start
+        self._event_end[slot] = end
+        self._event_count += 1
+
+    def _slots(self, frames):
+        # Completed frames, oldest first
+        frames = min(frames, self.frame, self.capacity - 1)
+        return [(self.frame - frames + i) % self.capacity for i in range(frames)]
+
+    def stage_averages(self, frames=60) -> dict[str, float]:
+        slots = self._slots(frames)
+        if not slots:
+            return {name: 0.0 for name in self.names}
+        return {
+            name: sum(durations[slot] for slot in slots) / len(slots)
+            for name, durations in zip(self.names, self._durations)
+        }
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def handle_event(self, event, trace_path=None):
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_F3:
+            self.toggle()
+        elif event.key == pygame.K_F4:
+            self.export_chrome_trace(trace_path or time.strftime("trace-%Y%m%d-%H%M%S.json"))
+
+    def chrome_trace(self) -> dict:
+        count = min(self._event_count, self._event_capacity)
+        first = self._event_count - count
+        events = []
+        for sequence in range(first, self._event_count):
+            slot = sequence % self._event_capacity
+            start = self._event_start[slot]
+            events.append({
+                "name": self.names[self._event_stage[slot]],
+                "ph": "X",
+                "ts": (start - self._origin) * 1_000_000,
+                "dur": (self._event_end[slot] - start) * 1_000_000,
+                "pid": 1,
+                "tid": 1,
+            })
+        for slot in self._slots(self.capacity):
+            if self._frame_time[slot]:
+                events.append({
+                    "name": "frame",
+                    "ph": "X",
+                    "ts": (self._frame_start[slot] - self._origin) * 1_000_000,
+                    "dur": self._frame_time[slot] * 1_000_000,
+                    "pid": 1,
+                    "tid": 0,
+                })
+        events.sort(key=lambda event: event["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.chrome_trace(), handle)
+        return path
+
+    def bounds(self, surface_height: int) -> pygame.Rect | None:
+        if not self.visible:
+            return None
+        height = 80 + 16 * len(self.names) + 32
+        return pygame.Rect(8, surface_height - height - 8, 256, height)
+
+    def draw(self, surface: pygame.Surface, frame_budget: float = 1 / 60):
+        if not self.visible:
+            return
+        if self._font is None:
+            self._font = pygame.freetype.Font(None, 14)
+        font = self._font
+
+        slots = self._slots(120)
+        width, graph_height = 240, 80
+        panel_rect = self.bounds(surface.get_height())
+        panel = create(panel_rect.size)  # Rebuilt every frame, so converting it would only add a copy
+        panel.fill((0, 0, 0, 170))
+
+        # One stacked bar per frame; the line marks the frame budget
+        scale = graph_height / (frame_budget * 2)
+        bar_width = width / max(len(slots), 1)
+        for column, slot in enumerate(slots):
+            x = 8 + int(column * bar_width)
+            y = 8 + graph_height
+            for index, durations in enumerate(self._durations):
+                height = int(durations[slot] * scale)
+                if height:
+                    color = STAGE_COLORS[index % len(STAGE_COLORS)]
+                    pygame.draw.rect(panel, color, (x, y - height, max(1, int(bar_width)), height))
+                    y -= height
+            frame_height = min(graph_height, int(self._frame_time[slot] * scale))
+            panel.fill((255, 255, 255), (x, 8 + graph_height - frame_height, max(1, int(bar_width)), 1))
+        budget_y = 8 + graph_height - int(frame_budget * scale)
+        pygame.draw.line(panel, (255, 255, 255), (8, budget_y), (8 + width, budget_y))
+
+        averages = self.stage_averages()
+        y = graph_height + 20
+        for index, name in enumerate(self.names):
+            color = STAGE_COLORS[index % len(STAGE_COLORS)]
+            pygame.draw.rect(panel, color, (8, y + 2, 10, 10))
+            font.render_to(panel, (24, y + 2), f"{name}: {averages[name] * 1000:.2f} ms", (255, 255, 255))
+            y += 16
+
+        surface.blit(panel, panel_rect)
@@ -0,0 +1,29 @@
+from collections import OrderedDict
+
+
+class PanelCache:
+    # Least-recently-used store for pre-rendered surfaces, keyed on everything they depend on
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, build):
+        surface = self._entries.get(key)
+        if surface is not None:
+            self._entries.move_to_end(key)
+            return surface
+
+        surface = build()
+        self._entries[key] = surface
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._entries.clear()
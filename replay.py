@@ -0,0 +1,102 @@
+import struct
+from dataclasses import dataclass, field
+
+import pygame
+from pygame.locals import *
+
+from simulation import InputState
+
+MAGIC = b"YMRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHQBH")  # magic, version, seed, fixed timestep flag, tick rate
+FRAME = struct.Struct("<HB")  # frame time in ms as returned by Clock.tick, input flags
+
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+ANSWER_YES = 8  # Y pressed this frame (points prompt)
+ANSWER_NO = 16  # N pressed this frame
+QUIT_GAME = 32  # Window closed or Escape pressed this frame
+
+
+def encode_frame(input_state: InputState, events) -> int:
+    flags = 0
+    if input_state.left:
+        flags |= LEFT
+    if input_state.right:
+        flags |= RIGHT
+    if input_state.jump:
+        flags |= JUMP
+    for event in events:
+        if event.type == QUIT:
+            flags |= QUIT_GAME
+        elif event.type == KEYDOWN:
+            if event.key == K_y:
+                flags |= ANSWER_YES
+            elif event.key == K_n:
+                flags |= ANSWER_NO
+            elif event.key == K_ESCAPE:
+                flags |= QUIT_GAME
+    return flags
+
+
+def decode_input(flags: int) -> InputState:
+    return InputState(left=bool(flags & LEFT), right=bool(flags & RIGHT), jump=bool(flags & JUMP))
+
+
+def decode_events(flags: int) -> list[pygame.event.Event]:
+    events = []
+    if flags & ANSWER_YES:
+        events.append(pygame.event.Event(KEYDOWN, key=K_y))
+    if flags & ANSWER_NO:
+        events.append(pygame.event.Event(KEYDOWN, key=K_n))
+    if flags & QUIT_GAME:
+        events.append(pygame.event.Event(QUIT))
+    return events
+
+
+@dataclass
+class Replay:
+    seed: int
+    fixed_timestep: bool
+    tick_rate: int
+    frames: list[tuple[int, int]] = field(default_factory=list)  # (frame ms, flags)
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class InputRecorder:
+    def __init__(self, path: str, seed: int, fixed_timestep: bool, tick_rate: int):
+        self.path = path
+        self.frames = 0
+        self._handle = open(path, "wb")
+        self._handle.write(HEADER.pack(MAGIC, VERSION, seed, int(fixed_timestep), tick_rate))
+
+    def record(self, frame_ms: int, input_state: InputState, events=()):
+        self._handle.write(FRAME.pack(min(frame_ms, 0xFFFF), encode_frame(input_state, events)))
+        self.frames += 1
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def load_replay(path: str) -> Replay:
+    with open(path, "rb") as handle:
+        data = handle.read()
+    magic, version, seed, fixed_timestep, tick_rate = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a replay file")
+    if version != VERSION:
+        raise ValueError(f"{path} uses replay version {version}, expected {VERSION}")
+    body = memoryview(data)[HEADER.size:]
+    usable = len(body) - len(body) % FRAME.size  # Ignore a partial record from an interrupted write
+    return Replay(seed, bool(fixed_timestep), tick_rate, list(FRAME.iter_unpack(body[:usable])))
@@ -0,0 +1,13 @@
+import random
+
+# Shared generator for cosmetic randomness (tile variants, clouds, fireworks, messages).
+# Reseeding it makes a whole run reproducible, which replays rely on.
+game_random = random.Random()
+
+
+def seed(value):
+    game_random.seed(value)
+
+
+def new_seed():
+    return random.SystemRandom().randrange(2 ** 63)
@@ -0,0 +1,66 @@
+import weakref
+
+import pygame
+
+from settings import *
+
+
+def internal_size(scale):
+    return round(WIDTH * scale), round(HEIGHT * scale)
+
+
+def scale_surface(surface, scale):
+    width, height = surface.get_size()
+    size = (round(width * scale), round(height * scale))
+    if not width or not height:
+        return pygame.Surface(size, surface.get_flags(), surface)
+    if float(scale).is_integer():
+        # Whole-number factors repeat pixels exactly, which is both sharp and the cheapest transform
+        return pygame.transform.scale(surface, size)
+    # Anything else is filtered; it is only paid once per asset, never per frame
+    return pygame.transform.smoothscale(surface, size)
+
+
+class ScaledCanvas:
+    # Takes blits in game coordinates (WIDTH x HEIGHT) and draws them on a target `scale` times the size.
+    # Each source is scaled on its first blit and kept for as long as the source lives; subsurfaces are
+    # cut from their scaled parent, so atlas frames share one scaled copy.
+    def __init__(self, target, scale):
+        self.target = target
+        self.scale = scale
+        self.alpha_blits = getattr(target, "alpha_blits", False)
+        self._sources = weakref.WeakKeyDictionary()
+
+    def get_size(self):
+        return WIDTH, HEIGHT
+
+    def get_width(self):
+        return WIDTH
+
+    def get_height(self):
+        return HEIGHT
+
+    def source(self, surface):
+        scaled = self._sources.get(surface)
+        if scaled is None:
+            scaled = self._sources[surface] = scale_surface(surface, self.scale)
+        return scaled
+
+    def _map(self, rect):
+        # Scale the edges rather than the size, so neighbouring rects still meet exactly
+        scale = self.scale
+        left, top = round(rect.left * scale), round(rect.top * scale)
+        return pygame.Rect(left, top, round(rect.right * scale) - left, round(rect.bottom * scale) - top)
+
+    def blit(self, source, dest, area=None, special_flags=0, **kwargs):
+        x, y = source.get_abs_offset()
+        src = pygame.Rect(x, y, *source.get_size())
+        if area is not None:
+            src = pygame.Rect(area).clip(pygame.Rect((0, 0), src.size)).move(x, y)
+        scaled = self.source(source.get_abs_parent())
+        position = (round(dest[0] * self.scale), round(dest[1] * self.scale))
+        return self.target.blit(scaled, position, self._map(src), special_flags, **kwargs)
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = [self.blit(*entry) for entry in blit_sequence]
+        return rects if doreturn else None
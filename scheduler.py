@@ -0,0 +1,68 @@
+import asyncio
+import time
+from collections import deque
+
+
+class FrameScheduler:
+    # Background jobs are async functions that call `await scheduler.checkpoint()` between slices of work.
+    # They only run inside run(), in whatever is left of the frame after update and draw.
+    def __init__(self):
+        self.deadline = 0.0
+        self._queued = deque()  # (job, args) not started yet; tasks need a running loop
+        self._tasks = set()
+        self._parked = deque()  # One future per job waiting for the next frame's budget
+        self._failed = []
+
+    def __len__(self):
+        return len(self._queued) + len(self._tasks)
+
+    def spawn(self, job, *args):
+        self._queued.append((job, args))
+
+    async def checkpoint(self):
+        if time.perf_counter() < self.deadline:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._parked.append(waiter)
+        await waiter
+
+    async def run(self, deadline):
+        self.deadline = deadline
+        while self._queued:
+            job, args = self._queued.popleft()
+            task = asyncio.ensure_future(job(*args))
+            self._tasks.add(task)
+            task.add_done_callback(self._finished)
+
+        # Round-robin: whoever had the budget first last frame goes last this time
+        parked = self._parked
+        self._parked = deque()
+        parked.rotate(-1)
+        for waiter in parked:
+            if not waiter.done():
+                waiter.set_result(None)
+
+        # Each ready job runs until it parks at a checkpoint or finishes; with no jobs this is a plain yield
+        while True:
+            await asyncio.sleep(0)
+            if time.perf_counter() >= deadline:
+                break
+            if len(self._parked) >= sum(1 for task in self._tasks if not task.done()):
+                break
+        self.deadline = 0.0
+
+        if self._failed:
+            task = self._failed.pop(0)
+            raise task.exception()
+
+    def _finished(self, task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._failed.append(task)
+
+    def cancel(self):
+        self._queued.clear()
+        for task in self._tasks:
+            task.cancel()
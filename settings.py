@@ -1,6 +1,27 @@
 WIDTH, HEIGHT = 800, 600
 TILE_SIZE = 50
+TILE_VARIANTS = 8  # Distinct grass tiles shared by every level
+LEVEL_SCREENS = 1  # Level width in screens; wider levels scroll with the player
+CHUNK_TILES = 16  # Tile columns per chunk; chunks are baked and drawn independently
+CHUNK_CACHE_SIZE = 6  # Baked chunks kept per level
 FRAMERATE_LIMIT = 60
+DIRTY_RECT_RENDERING = False  # Only redraw and push the regions that changed each frame (surface backend at scale 1 only)
+RENDER_BACKEND = "surface"  # "texture" composites uploaded textures with SDL's renderer instead of blitting on the CPU
+TEXTURE_ACCELERATED = -1  # Texture backend: -1 lets SDL choose, 0 forces its software renderer, 1 requires a GPU
+RENDER_SCALE = 1  # Internal resolution as a multiple of WIDTH x HEIGHT; game coordinates stay the same
+FULLSCREEN = False  # Stretch the internal resolution over the whole display
+FIXED_TIMESTEP = False  # Simulate at SIMULATION_TICK_RATE and interpolate rendering between ticks
+SIMULATION_TICK_RATE = 120
+MAX_FRAME_TIME = 0.25  # Longest stretch of real time simulated in one frame
+
+# Endless mode plays procedural levels from a pack generated once and cached on disk
+LEVEL_PACK_DIR = "level_packs"
+LEVEL_PACK_SIZE = 500
+ENDLESS_PACK_SEED = 1
+LEVEL_CACHE_SIZE = 3  # Built levels kept around: previous, current and the prefetched next one
+SCHEDULER_MARGIN = 0.002  # Seconds of each frame kept free when running background jobs
+SURFACE_CACHE = True  # Keep generated artwork on disk so later launches skip rebuilding it
+SURFACE_CACHE_DIR = "surface_cache"
 
 # Colors
 WHITE = (255, 255, 255)
@@ -18,6 +39,10 @@ GRAY = (128, 128, 128)
 RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 
+# Sky settings
+SKY_KEYFRAMES = 64  # Pre-blended day-to-dusk steps
+SKY_MAX_DUSK_ALPHA = 200
+
 # Physics constants
 GRAVITY = 1200
 MAX_FALL_SPEED = 800
@@ -45,3 +70,4 @@ MESSAGES = [
     "If you want, we can call these moments points.",
     "Whatever you decide, thank you for walking with me.",
 ]
+ENDLESS_MESSAGE = "Clearing {number}. The glow keeps going."  # Shown on levels past the story
@@ -0,0 +1,410 @@
+import random
+from dataclasses import dataclass, field
+
+import pygame
+from pygame.locals import *
+
+from assets import load_images
+from collision import TileGrid
+from settings import *
+from tile import Tile
+
+BLUEPRINTS = [
+    {
+        "columns": [(6, 1, 1), (9, 2, 1), (13, 1, 1)],
+        "platforms": [(4, 2, 3)],
+    },
+    {
+        "columns": [(5, 1, 1), (7, 1, 1), (9, 1, 1), (12, 2, 1)],
+        "platforms": [(8, 1, 4), (11, 1, 3)],
+    },
+    {
+        "columns": [(6, 2, 1), (10, 1, 1), (14, 1, 1)],
+        "platforms": [(7, 2, 3), (12, 1, 4)],
+    },
+    {
+        "columns": [(4, 1, 1), (8, 2, 1), (11, 1, 1), (13, 1, 1)],
+        "platforms": [(6, 1, 3), (9, 1, 4)],
+    },
+    {
+        "columns": [(5, 1, 1), (7, 2, 1), (10, 1, 1), (12, 2, 1)],
+        "platforms": [(6, 1, 3), (9, 2, 4)],
+    },
+    {
+        "columns": [(6, 1, 1), (8, 1, 1), (10, 2, 1), (13, 1, 1)],
+        "platforms": [(7, 1, 3), (11, 1, 4), (14, 1, 3)],
+    },
+]
+
+PLAYER_START = (100, HEIGHT - TILE_SIZE * 2)
+# Animation frame -> sprite file; every frame is packed into the player's atlas
+PLAYER_FRAMES = {
+    "stand_right": "playerr.png",
+    "walk_right": "playersr.png",
+    "jump_right": "playerjr.png",
+    "stand_left": "player.png",
+    "walk_left": "playersl.png",
+    "jump_left": "playerjl.png",
+}
+PLAYER_SPRITES = tuple(PLAYER_FRAMES.values())
+
+
+@dataclass(frozen=True, slots=True)
+class InputState:
+    left: bool = False
+    right: bool = False
+    jump: bool = False
+
+    @classmethod
+    def from_keys(cls, keys):
+        return cls(
+            left=bool(keys[K_LEFT] or keys[K_a]),
+            right=bool(keys[K_RIGHT] or keys[K_d]),
+            jump=bool(keys[K_SPACE] or keys[K_UP]),
+        )
+
+
+NO_INPUT = InputState()
+
+
+@dataclass
+class LevelLayout:
+    index: int
+    tiles: list[tuple[int, int]] = field(default_factory=list)
+    flowers: list[dict] = field(default_factory=list)
+    width: int = WIDTH  # World width in pixels; the goal is at the right end
+
+
+def generate_layout(index, blueprint=None, seed=None, screens=LEVEL_SCREENS):
+    # blueprint: one for the first screen (later screens cycle BLUEPRINTS), or a list with one per screen
+    layout = LevelLayout(index, width=WIDTH * screens)
+    occupied = set()  # Track occupied tile coords to avoid duplicates
+
+    def add_tile(x, y):
+        if (x, y) not in occupied:
+            occupied.add((x, y))
+            layout.tiles.append((x, y))
+
+    # Base ground layer
+    for x in range(0, layout.width, TILE_SIZE):
+        add_tile(x, HEIGHT - TILE_SIZE)
+
+    if isinstance(blueprint, (list, tuple)):
+        blueprints = [blueprint[screen % len(blueprint)] for screen in range(screens)]
+    else:
+        blueprints = [BLUEPRINTS[(index + screen) % len(BLUEPRINTS)] for screen in range(screens)]
+        if blueprint is not None:
+            blueprints[0] = blueprint
+
+    # Nudge the layout slightly to keep things fresh while remaining fair
+    lane_shift = min(index // len(BLUEPRINTS), 2)
+    max_tile_index = WIDTH // TILE_SIZE
+
+    def clamp_column_start(tile_x, width):
+        return min(tile_x, max_tile_index - width - 1)
+
+    # Every screen is laid out like a one-screen level, shifted right
+    for screen, blueprint in enumerate(blueprints):
+        screen_x = screen * WIDTH
+
+        # Place grounded columns (single-tile jumps and gentle doubles)
+        for tile_x, width, height in blueprint.get("columns", []):
+            start = clamp_column_start(tile_x + lane_shift, width)
+            for dx in range(width):
+                for level in range(height):
+                    x_pos = screen_x + (start + dx) * TILE_SIZE
+                    y_pos = HEIGHT - TILE_SIZE * (2 + level)
+                    add_tile(x_pos, y_pos)
+
+        # Place floating platforms for optional shortcuts/rewards
+        for tile_x, width, level_height in blueprint.get("platforms", []):
+            start = clamp_column_start(tile_x + lane_shift, width)
+            y_pos = HEIGHT - TILE_SIZE * level_height
+            for dx in range(width):
+                x_pos = screen_x + (start + dx) * TILE_SIZE
+                add_tile(x_pos, y_pos)
+
+    # Deterministic RNG so levels feel curated per index
+    rng = random.Random(index * 734 if seed is None else seed)
+
+    # Gentle floating platforms for variation (deterministic)
+    max_tiles_wide = WIDTH // TILE_SIZE
+    for screen in range(screens):
+        num_extra = rng.randint(1, 2)
+        for _ in range(num_extra):
+            platform_width_tiles = rng.randint(1, 2)
+            start_tile_x = rng.randint(4, max(4, max_tiles_wide - (4 + platform_width_tiles)))
+            platform_x = screen * WIDTH + start_tile_x * TILE_SIZE
+            platform_y = HEIGHT - TILE_SIZE * rng.randint(3, 4)
+            for t in range(platform_width_tiles):
+                add_tile(platform_x + t * TILE_SIZE, platform_y)
+
+    # Scatter flowers along ground tiles (deterministic)
+    for x, y in layout.tiles:
+        if y + TILE_SIZE == HEIGHT and rng.random() < 0.22:
+            stem_height = rng.randint(12, 18)
+            flower_x = x + rng.randint(10, TILE_SIZE - 10)
+            layout.flowers.append({
+                "stem_start": (flower_x, y),
+                "stem_end": (flower_x, y - stem_height),
+                "color": rng.choice(FLOWER_COLORS),
+                "radius": rng.randint(4, 6),
+            })
+    return layout
+
+
+def build_grid(layout):
+    # Collision only needs rects, so every tile shares variant 0 and the global RNG is untouched
+    return TileGrid(Tile(x, y, variant=0) for x, y in layout.tiles)
+
+
+_sprite_size = None
+
+
+def sprite_size():
+    # The player's collision box is the largest sprite; decoding needs no display
+    global _sprite_size
+    if _sprite_size is None:
+        sizes = [image.get_size() for image in load_images(PLAYER_SPRITES).values() if image is not None]
+        _sprite_size = (max(w for w, _ in sizes), max(h for _, h in sizes))
+    return _sprite_size
+
+
+class PlayerBody:
+    def __init__(self, x, y, width, height, world_width=WIDTH):
+        self.rect = pygame.Rect(int(x), int(y), width, height)
+        self.world_width = world_width
+
+        # Use floating-point positions for smoother movement
+        self.pos_x = x
+        self.pos_y = y
+        # Position before the latest update, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
+
+        # Physics
+        self.vel_x = 0
+        self.vel_y = 0
+        self.speed = 300
+        self.acceleration = 2500
+        self.deceleration = 1800
+        self.jump_height = 500
+        self.on_ground = False
+        self.facing_right = True
+        self.controls_enabled = True
+        self.moving_input = False
+
+        # Jump forgiveness
+        self.coyote_time = 0.12
+        self.jump_buffer = 0.15
+        self.coyote_timer = 0
+        self.jump_buffer_timer = 0
+        self.was_jump_pressed = False
+
+    def set_controls_enabled(self, enabled: bool):
+        self.controls_enabled = enabled
+
+    def reset(self, x, y):
+        self.pos_x = x
+        self.pos_y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.vel_x = 0
+        self.vel_y = 0
+        self.on_ground = False
+        self.facing_right = True
+        self.moving_input = False
+        self.rect.topleft = (int(self.pos_x), int(self.pos_y))
+
+    def snapshot(self):
+        # Everything step() reads, so a body can be rewound and stepped again identically
+        return (
+            self.pos_x, self.pos_y, self.vel_x, self.vel_y, self.on_ground, self.facing_right,
+            self.moving_input, self.coyote_timer, self.jump_buffer_timer, self.was_jump_pressed,
+        )
+
+    def restore(self, state):
+        (
+            self.pos_x, self.pos_y, self.vel_x, self.vel_y, self.on_ground, self.facing_right,
+            self.moving_input, self.coyote_timer, self.jump_buffer_timer, self.was_jump_pressed,
+        ) = state
+        self.prev_x = self.pos_x
+        self.prev_y = self.pos_y
+        self.rect.topleft = (int(self.pos_x), int(self.pos_y))
+
+    def step(self, tiles, input_state, dt):
+        self.prev_x = self.pos_x
+        self.prev_y = self.pos_y
+        self.update_timers(dt)
+        self.apply_input(input_state, dt)
+        self.try_jump()
+        self.apply_physics(dt)
+        self.move(tiles, dt)
+
+    def apply_input(self, input_state, dt):
+        if not self.controls_enabled:
+            self.vel_x = self._approach(self.vel_x, 0, self.deceleration * dt)
+            self._update_jump_buffer(False)
+            self.moving_input = False
+            return
+
+        direction = 0
+        if input_state.left:
+            direction -= 1
+        if input_state.right:
+            direction += 1
+
+        self.moving_input = direction != 0
+
+        if direction != 0:
+            self.vel_x += direction * self.acceleration * dt
+            self.vel_x = max(-self.speed, min(self.vel_x, self.speed))
+            self.facing_right = direction > 0
+        else:
+            self.vel_x = self._approach(self.vel_x, 0, self.deceleration * dt)
+
+        self._update_jump_buffer(input_state.jump)
+
+    def _update_jump_buffer(self, jump_pressed: bool):
+        if jump_pressed and not self.was_jump_pressed:
+            self.jump_buffer_timer = self.jump_buffer
+        self.was_jump_pressed = jump_pressed
+
+    def apply_physics(self, dt):
+        # Gravity
+        self.vel_y += GRAVITY * dt
+        if self.vel_y > MAX_FALL_SPEED:
+            self.vel_y = MAX_FALL_SPEED
+
+    def move(self, tiles, dt):
+        # Horizontal
+        self.pos_x += self.vel_x * dt
+        self.rect.x = int(self.pos_x)
+        if self.rect.left < 0:
+            self.pos_x = 0
+            self.rect.left = 0
+            self.vel_x = 0
+        elif self.rect.centerx > self.world_width:
+            # Half the sprite may cross the right edge, so the goal just before it stays reachable
+            self.pos_x = self.world_width - self.rect.width // 2
+            self.rect.x = int(self.pos_x)
+            self.vel_x = 0
+        self.handle_collisions(self._nearby_tiles(tiles), "horizontal")
+
+        # Vertical
+        self.pos_y += self.vel_y * dt
+        self.rect.y = int(self.pos_y)
+        self.on_ground = False
+        self.handle_collisions(self._nearby_tiles(tiles), "vertical")
+
+        self.rect.topleft = (int(self.pos_x), int(self.pos_y))
+
+    def _nearby_tiles(self, tiles):
+        # A spatial index only hands back tiles around the player; plain lists are scanned whole
+        if hasattr(tiles, "query"):
+            margin = TILE_SIZE // 2  # Room for the step-up assist and collision push-back
+            return tiles.query(self.rect.inflate(margin * 2, margin * 2))
+        return tiles
+
+    def handle_collisions(self, tiles, direction):
+        for tile in tiles:
+            if self.rect.colliderect(tile.rect):
+                if direction == "horizontal":
+                    if self.vel_x > 0:  # right
+                        self.pos_x = tile.rect.left - self.rect.width
+                    elif self.vel_x < 0:  # left
+                        self.pos_x = tile.rect.right
+                    self.vel_x = 0
+                    # Gentle step-up assist so the player doesn't snag on ledges
+                    ledge_overlap = tile.rect.top - self.rect.bottom
+                    if 0 > ledge_overlap >= -TILE_SIZE // 3:
+                        self.pos_y = tile.rect.top - self.rect.height
+                        self.rect.y = int(self.pos_y)
+                        self.vel_y = 0
+                        self.on_ground = True
+                elif direction == "vertical":
+                    if self.vel_y > 0:  # falling
+                        self.pos_y = tile.rect.top - self.rect.height
+                        self.vel_y = 0
+                        self.on_ground = True
+                    elif self.vel_y < 0:  # rising
+                        self.pos_y = tile.rect.bottom
+                        self.vel_y = 0
+                self.rect.topleft = (int(self.pos_x), int(self.pos_y))
+
+    def update_timers(self, dt):
+        if self.on_ground:
+            self.coyote_timer = self.coyote_time
+        else:
+            self.coyote_timer = max(0, self.coyote_timer - dt)
+
+        if self.jump_buffer_timer > 0:
+            self.jump_buffer_timer = max(0, self.jump_buffer_timer - dt)
+
+    def try_jump(self):
+        if self.jump_buffer_timer > 0 and (self.on_ground or self.coyote_timer > 0):
+            self.vel_y = -self.jump_height
+            self.on_ground = False
+            self.coyote_timer = 0
+            self.jump_buffer_timer = 0
+
+    def _approach(self, value, target, amount):
+        if value < target:
+            return min(target, value + amount)
+        if value > target:
+            return max(target, value - amount)
+        return target
+
+
+def reached_goal(body):
+    return body.rect.centerx >= body.world_width - TILE_SIZE and body.vel_x >= 0
+
+
+class Simulation:
+    # Headless stepping of one level: no window, no clock, no keyboard
+    def __init__(self, index, layout=None, size=None, start=PLAYER_START):
+        self.layout = layout if layout is not None else generate_layout(index)
+        self.grid = build_grid(self.layout)
+        width, height = size if size is not None else sprite_size()
+        self.body = PlayerBody(start[0], start[1], width, height, self.layout.width)
+        self.frames = 0
+        self.finished = False
+
+    def step(self, input_state, dt):
+        self.body.step(self.grid, input_state, dt)
+        self.frames += 1
+        if not self.finished and reached_goal(self.body):
+            self.finished = True
+        return self.finished
+
+    def run(self, inputs, dt=1 / FRAMERATE_LIMIT):
+        # inputs: iterable of InputState, or of (InputState, dt) pairs
+        for entry in inputs:
+            if isinstance(entry, InputState):
+                finished = self.step(entry, dt)
+            else:
+                finished = self.step(entry[0], entry[1])
+            if finished:
+                break
+        return self.finished
+
+
+def _walk_right(frames):
+    # Hold right and tap jump twice a second
+    return [InputState(right=True, jump=frame % 30 < 3) for frame in range(frames)]
+
+
+if __name__ == "__main__":
+    import time
+
+    inputs = _walk_right(FRAMERATE_LIMIT * 20)
+    for index in range(len(MESSAGES)):
+        simulation = Simulation(index)
+        start = time.perf_counter()
+        finished = simulation.run(inputs)
+        elapsed = time.perf_counter() - start
+        speedup = simulation.frames / FRAMERATE_LIMIT / elapsed if elapsed else float("inf")
+        print(
+            f"level {index:2d}: {'finished' if finished else 'not finished'} after {simulation.frames} steps "
+            f"({simulation.frames / elapsed:,.0f} steps/s, {speedup:,.0f}x real time)"
+        )
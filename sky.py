@@ -0,0 +1,112 @@
+import pygame
+from surface_cache import get_surface_cache
+from surfaces import create, finish
+from settings import *
+
+SKY_VERSION = 1  # Bump when the gradient or blending changes so cached skies are rebuilt
+
+
+def gradient_colors(top_color, bottom_color, height=HEIGHT):
+    colors = []
+    for y in range(height):
+        ratio = y / height
+        colors.append(tuple(int(top * (1 - ratio) + bottom * ratio) for top, bottom in zip(top_color, bottom_color)))
+    return colors
+
+
+def blend_colors(base, overlay, alpha):
+    # Same result as blitting the overlay over the base with set_alpha(alpha)
+    weight = alpha / 255
+    return [
+        tuple(int(b + (o - b) * weight) for b, o in zip(base_color, overlay_color))
+        for base_color, overlay_color in zip(base, overlay)
+    ]
+
+
+def column_surface(colors):
+    column = create((1, len(colors)), alpha=False)
+    for y, color in enumerate(colors):
+        column.set_at((0, y), color)
+    return column
+
+
+def gradient_surface(colors, width=WIDTH):
+    # A vertical gradient is one column stretched sideways; no per-row drawing needed
+    if isinstance(colors, pygame.Surface):
+        surface = pygame.transform.scale(colors, (width, colors.get_height()))
+    else:
+        surface = pygame.transform.scale(column_surface(colors), (width, len(colors)))
+    return finish(surface, alpha=False)
+
+
+class Sky:
+    def __init__(self, keyframes=SKY_KEYFRAMES):
+        self.keyframes = max(2, keyframes)
+        self.day = gradient_colors(SKY_BLUE, HORIZON_BLUE)
+        self.dusk = gradient_colors(TWILIGHT_TOP, TWILIGHT_BOTTOM)
+        # Every keyframe is a single blended column; full-size skies are only built on demand
+        self._columns = [None] * self.keyframes
+        self._surfaces = {}
+        self._layers = None
+        # Every keyframe side by side, one pixel wide each; loaded from disk when a previous run stored it
+        self.strip = get_surface_cache().load("sky", SKY_VERSION, (self.keyframes,), alpha=False)
+
+    def column(self, index):
+        if self.strip is not None:
+            return self.strip.subsurface((index, 0, 1, self.strip.get_height()))
+        column = self._columns[index]
+        if column is None:
+            column = self._columns[index] = blend_colors(self.day, self.dusk, self.keyframe_alpha(index))
+        return column
+
+    def store(self):
+        # Called once every column has been blended, so the next launch can skip blending altogether
+        if self.strip is not None or None in self._columns:
+            return
+        strip = create((self.keyframes, HEIGHT), alpha=False)
+        for index, colors in enumerate(self._columns):
+            strip.blit(column_surface(colors), (index, 0))
+        get_surface_cache().store("sky", SKY_VERSION, (self.keyframes,), strip, alpha=False)
+
+    def keyframe_alpha(self, index):
+        return SKY_MAX_DUSK_ALPHA * index / (self.keyframes - 1)
+
+    def keyframe(self, progress):
+        dusk_alpha = max(0, min(SKY_MAX_DUSK_ALPHA, int(SKY_MAX_DUSK_ALPHA * progress)))
+        return round(dusk_alpha * (self.keyframes - 1) / SKY_MAX_DUSK_ALPHA)
+
+    def surface(self, progress):
+        return self.prepare(self.keyframe(progress))
+
+    def prepare(self, index):
+        surface = self._surfaces.get(index)
+        if surface is None:
+            # Keep the previous, current and upcoming skies; whichever is furthest from the new one goes
+            if len(self._surfaces) >= 3:
+                self._surfaces.pop(max(self._surfaces, key=lambda key: abs(key - index)))
+            surface = self._surfaces[index] = gradient_surface(self.column(index))
+        return surface
+
+    def upcoming(self, progress):
+        # The keyframe after the one on screen if it still needs building; texture canvases never build any
+        index = self.keyframe(progress) + 1
+        if not self._surfaces or index >= self.keyframes or index in self._surfaces:
+            return None
+        return index
+
+    def layers(self):
+        # Plain day and dusk gradients for canvases that fade one over the other themselves
+        if self._layers is None:
+            self._layers = (gradient_surface(self.day), gradient_surface(self.dusk))
+        return self._layers
+
+    def draw(self, surface, progress):
+        if not getattr(surface, "alpha_blits", False):
+            surface.blit(self.surface(progress), (0, 0))
+            return
+        # Texture canvases blend dusk over day with alpha modulation, so no keyframe is ever built
+        day, dusk = self.layers()
+        surface.blit(day, (0, 0))
+        alpha = int(self.keyframe_alpha(self.keyframe(progress)))
+        if alpha:
+            surface.blit(dusk, (0, 0), alpha=alpha)
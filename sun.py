@@ -1,4 +1,5 @@
 import pygame
+from glow import disc, sun_glow
 from settings import *
 
 class Sun:
@@ -13,22 +14,17 @@ class Sun:
     def update(self, level_progress):
         self.current_y = self.start_y + (self.end_y - self.start_y) * level_progress
 
+    def bounds(self):
+        glow_rect = sun_glow(self.color, self.radius).get_rect(center=(int(self.x), int(self.current_y)))
+        body = pygame.Rect(0, 0, self.radius * 2 + 1, self.radius * 2 + 1)
+        body.center = (int(self.x), int(self.current_y))
+        return glow_rect.union(body)
+
     def draw(self, surface):
-        glow_size = self.radius * 4
-        glow_surface = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
+        glow_surface = sun_glow(self.color, self.radius)
         glow_center = glow_surface.get_rect().center
-
-        for i, alpha in enumerate((70, 45, 20)):
-            scale = 2.6 - i * 0.7
-            pygame.draw.circle(
-                glow_surface,
-                (*self.color, alpha),
-                glow_center,
-                int(self.radius * scale),
-            )
-
         surface.blit(
             glow_surface,
             (int(self.x) - glow_center[0], int(self.current_y) - glow_center[1]),
         )
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.current_y)), self.radius)
+        surface.blit(disc(self.color, self.radius), (int(self.x) - self.radius, int(self.current_y) - self.radius))
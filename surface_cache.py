@@ -0,0 +1,97 @@
+import glob
+import hashlib
+import os
+import struct
+
+import pygame
+
+import settings
+from assets import asset_path
+from surfaces import display_ready, finish
+from settings import *
+
+MAGIC = b"YMSC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHH4s")  # magic, version, width, height, pixel format
+
+
+_settings_digest = None
+
+
+def settings_digest():
+    # Every constant in settings.py; artwork is regenerated whenever any of them changes
+    global _settings_digest
+    if _settings_digest is None:
+        constants = sorted((name, repr(value)) for name, value in vars(settings).items() if name.isupper())
+        _settings_digest = hashlib.blake2b(repr(constants).encode(), digest_size=16).digest()
+    return _settings_digest
+
+
+def _finish(surface, alpha):
+    if not display_ready():
+        return surface.copy()  # Detach from the file's buffer
+    return finish(surface, alpha)
+
+
+class SurfaceCache:
+    # Baked artwork stored as raw pixels, one file per (generator, version, parameters, settings) key
+    def __init__(self, directory=SURFACE_CACHE_DIR, enabled=SURFACE_CACHE):
+        self.directory = asset_path(directory)
+        self.enabled = enabled
+
+    def path(self, name, version, params=()):
+        key = hashlib.blake2b(repr((name, version, params)).encode() + settings_digest(), digest_size=16)
+        return os.path.join(self.directory, f"{name}-{key.hexdigest()}.surf")
+
+    def get(self, name, version, params, build, alpha=True):
+        # build() returns an unconverted surface; the result is converted for the display either way
+        surface = self.load(name, version, params, alpha)
+        if surface is None:
+            surface = build()
+            self.store(name, version, params, surface, alpha)
+            surface = _finish(surface, alpha)
+        return surface
+
+    def load(self, name, version, params=(), alpha=True):
+        if not self.enabled:
+            return None
+        try:
+            with open(self.path(name, version, params), "rb") as handle:
+                data = handle.read()
+            magic, file_version, width, height, pixel_format = HEADER.unpack_from(data)
+            fmt = pixel_format.rstrip(b"\0").decode()
+            if magic != MAGIC or file_version != VERSION or fmt != ("RGBA" if alpha else "RGB"):
+                raise ValueError("stale surface cache entry")
+            surface = pygame.image.frombuffer(memoryview(data)[HEADER.size:], (width, height), fmt)
+        except (OSError, ValueError, struct.error):
+            return None
+        return _finish(surface, alpha)
+
+    def store(self, name, version, params, surface, alpha=True):
+        if not self.enabled:
+            return
+        fmt = "RGBA" if alpha else "RGB"
+        path = self.path(name, version, params)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Older bakes of the same artwork can never be hit again
+            for stale in glob.glob(os.path.join(glob.escape(self.directory), f"{glob.escape(name)}-*.surf")):
+                if stale != path:
+                    os.remove(stale)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as handle:
+                handle.write(HEADER.pack(MAGIC, VERSION, *surface.get_size(), fmt.encode()))
+                handle.write(pygame.image.tobytes(surface, fmt))
+            os.replace(temporary, path)
+        except OSError:
+            pass  # A read-only or full disk only costs the speed-up
+
+
+_cache = None
+
+
+def get_surface_cache():
+    global _cache
+    if _cache is None:
+        _cache = SurfaceCache()
+    return _cache
@@ -0,0 +1,20 @@
+import pygame
+
+
+def display_ready():
+    return pygame.display.get_surface() is not None
+
+
+def create(size, alpha=True):
+    # Only surfaces with see-through parts get an alpha channel; opaque ones blit as plain copies
+    if alpha:
+        return pygame.Surface(size, pygame.SRCALPHA)
+    return pygame.Surface(size)
+
+
+def finish(surface, alpha=True):
+    # Generated artwork is converted to the display's pixel format once, so blits never convert per pixel.
+    # Without a display (headless tools) surfaces are left as they are.
+    if not display_ready():
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
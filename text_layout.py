@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import NamedTuple
+
+import pygame
+import pygame.freetype
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    lines: tuple[str, ...]
+    widths: tuple[int, ...]
+    max_width: int
+
+    @property
+    def width(self) -> int:
+        return max(self.widths, default=0)
+
+
+class WordMetrics(NamedTuple):
+    left: int  # Ink offset from the pen position at the start of the word
+    advance: float  # Pen movement across the whole word
+    right: int  # Ink extent measured from the pen position at the start of the word
+
+
+class FontMetrics:
+    # Each distinct word is measured once per font; lines are packed by summing advances
+    def __init__(self, font: pygame.freetype.Font):
+        self.font = font
+        self.words: dict[str, WordMetrics] = {}
+        self.space = self._advance(" ")
+
+    def word(self, word: str) -> WordMetrics:
+        metrics = self.words.get(word)
+        if metrics is None:
+            rect = self.font.get_rect(word)
+            metrics = WordMetrics(rect.x, self._advance(word), rect.x + rect.width)
+            self.words[word] = metrics
+        return metrics
+
+    def _advance(self, text: str) -> float:
+        glyphs = self.font.get_metrics(text)
+        return sum(glyph[4] for glyph in glyphs if glyph)
+
+
+_metrics: dict[pygame.freetype.Font, FontMetrics] = {}
+
+
+def font_metrics(font: pygame.freetype.Font) -> FontMetrics:
+    metrics = _metrics.get(font)
+    if metrics is None:
+        metrics = _metrics[font] = FontMetrics(font)
+    return metrics
+
+
+@lru_cache(maxsize=256)
+def layout_text(font: pygame.freetype.Font, text: str, max_width: int) -> TextLayout:
+    metrics = font_metrics(font)
+    space = metrics.space
+    lines: list[str] = []
+    widths: list[int] = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if not words:
+            lines.append("")
+            widths.append(0)
+            continue
+        first = metrics.word(words[0])
+        line_words = [words[0]]
+        line_left = first.left
+        line_width = first.right - first.left
+        pen = first.advance  # Pen position after the last word on the line
+        for word in words[1:]:
+            current = metrics.word(word)
+            start = pen + space
+            candidate_width = int(round(start)) + current.right - line_left
+            if candidate_width <= max_width:
+                line_words.append(word)
+                line_width = candidate_width
+                pen = start + current.advance
+            else:
+                lines.append(" ".join(line_words))
+                widths.append(line_width)
+                line_words = [word]
+                line_left = current.left
+                line_width = current.right - current.left
+                pen = current.advance
+        lines.append(" ".join(line_words))
+        widths.append(line_width)
+    return TextLayout(lines=tuple(lines), widths=tuple(widths), max_width=max_width)
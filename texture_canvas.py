@@ -0,0 +1,106 @@
+import weakref
+
+import pygame
+
+try:
+    from pygame._sdl2.video import Renderer, Texture, Window
+except ImportError:  # pygame built without the SDL2 video bindings
+    Renderer = Texture = Window = None
+
+from settings import *
+
+
+def texture_rendering_available():
+    return Renderer is not None
+
+
+def _premultiplied_passes(surface):
+    # SDL's renderer has no premultiplied blend, so it is done in two passes:
+    # MOD with (1 - alpha) darkens what is underneath, then ADD puts the colour on top
+    shade = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+    shade.fill((255, 255, 255, 255))
+    coverage = surface.copy()
+    coverage.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_MIN)
+    shade.blit(coverage, (0, 0))
+    colour = surface.copy()
+    colour.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_MAX)
+    return shade, colour
+
+
+class TextureCanvas:
+    # Stands in for the screen Surface: every blit becomes a texture copy composited by SDL's renderer.
+    # Each source surface is uploaded on its first blit (subsurfaces share their parent's texture),
+    # so surfaces must not be drawn on after they have been shown; changed artwork needs a new surface.
+    # Only blits are supported, so shapes are pre-rendered as sprites (see glow.disc) rather than drawn per frame.
+    alpha_blits = True  # blit() takes an alpha, applied as a texture alpha mod
+
+    def __init__(self, title, size=(WIDTH, HEIGHT), accelerated=TEXTURE_ACCELERATED, fullscreen=False):
+        self.window = Window(title, size, fullscreen_desktop=fullscreen)
+        self.renderer = Renderer(self.window, accelerated=accelerated)
+        if fullscreen:
+            # The renderer stretches `size` over the display, letterboxed, as part of compositing
+            self.renderer.logical_size = size
+        self.size = size
+        self._textures = weakref.WeakKeyDictionary()  # Textures go away with the surfaces they were made from
+        self._premultiplied = weakref.WeakKeyDictionary()
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def _upload(self, surface, blend_mode=None):
+        texture = Texture.from_surface(self.renderer, surface)
+        if blend_mode is not None:
+            texture.blend_mode = blend_mode
+        return texture
+
+    def texture(self, surface):
+        texture = self._textures.get(surface)
+        if texture is None:
+            texture = self._textures[surface] = self._upload(surface)
+        return texture
+
+    def blit(self, source, dest, area=None, special_flags=0, alpha=255):
+        root = source.get_abs_parent()
+        x, y = source.get_abs_offset()
+        src = pygame.Rect(x, y, *source.get_size())
+        dst = pygame.Rect(dest[0], dest[1], src.width, src.height)
+        if area is not None:
+            area = pygame.Rect(area).clip(pygame.Rect((0, 0), src.size))
+            src = area.move(x, y)
+            dst.size = area.size
+
+        if special_flags == pygame.BLEND_PREMULTIPLIED:
+            passes = self._premultiplied.get(root)
+            if passes is None:
+                shade, colour = _premultiplied_passes(root)
+                passes = self._premultiplied[root] = (
+                    self._upload(shade, pygame.BLENDMODE_MOD),
+                    self._upload(colour, pygame.BLENDMODE_ADD),
+                )
+            for texture in passes:
+                texture.draw(srcrect=src, dstrect=dst)
+            return dst
+
+        texture = self.texture(root)
+        if alpha < 255 and texture.blend_mode != pygame.BLENDMODE_BLEND:
+            texture.blend_mode = pygame.BLENDMODE_BLEND  # Opaque surfaces upload without blending
+        texture.alpha = alpha
+        texture.draw(srcrect=src, dstrect=dst)
+        return dst
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = [self.blit(*entry) for entry in blit_sequence]
+        return rects if doreturn else None
+
+    def clear(self):
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+
+    def present(self):
+        self.renderer.present()
@@ -1,50 +1,91 @@
 import random
 import pygame
+from rng import game_random
+from surface_cache import get_surface_cache
+from surfaces import create
 from settings import *
 
+ATLAS_SEED = 50  # Grass artwork is fixed so building the atlas never disturbs game_random
+ATLAS_VERSION = 1  # Bump when _build_tile_surface changes so cached atlases are rebuilt
+
+
+class TileAtlas:
+    def __init__(self, variants=TILE_VARIANTS):
+        self.variants = variants
+        self.surface = get_surface_cache().get("atlas", ATLAS_VERSION, (variants, ATLAS_SEED), self._build)
+        self.frames = [self.surface.subsurface(self.area(index)) for index in range(variants)]
+
+    def _build(self):
+        surface = create((TILE_SIZE * self.variants, TILE_SIZE))
+        rng = random.Random(ATLAS_SEED)
+        for index in range(self.variants):
+            _build_tile_surface(surface.subsurface(self.area(index)), rng)
+        return surface
+
+    def area(self, variant):
+        return pygame.Rect(variant * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE)
+
+
+_atlas = None
+
+
+def get_atlas():
+    global _atlas
+    if _atlas is None:
+        _atlas = TileAtlas()
+    return _atlas
+
+
 class Tile:
-    def __init__(self, x, y):
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self._build_tile_surface()
+    # Tiles only carry a position and a variant; the artwork lives in the shared atlas
+    __slots__ = ("rect", "variant")
+
+    def __init__(self, x, y, variant=None):
+        self.rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+        self.variant = game_random.randrange(TILE_VARIANTS) if variant is None else variant
+
+    @property
+    def image(self):
+        return get_atlas().frames[self.variant]
 
     def draw(self, surface):
         surface.blit(self.image, self.rect)
 
-    def _build_tile_surface(self):
-        base_rect = self.image.get_rect()
-        # Shadow base to give the tile depth
-        pygame.draw.rect(self.image, GROUND_SHADOW, base_rect, border_radius=6)
-
-        # Slight inset for the grassy top
-        top_rect = base_rect.inflate(-6, -6)
-        top_rect.height -= 6
-        top_rect.y += 2
-        pygame.draw.rect(self.image, GROUND_GREEN, top_rect, border_radius=6)
-
-        # Soft highlight near the top edge
-        highlight = pygame.Surface((top_rect.width, 8), pygame.SRCALPHA)
-        highlight.fill((*WHITE, 45))
-        self.image.blit(highlight, (top_rect.x, top_rect.y + 3))
-
-        # Horizontal ridges for texture
-        for offset in (top_rect.bottom - 12, top_rect.bottom - 20):
-            pygame.draw.line(
-                self.image,
-                (*BLACK, 35),
-                (top_rect.left + 6, offset),
-                (top_rect.right - 6, offset),
-                2,
-            )
-
-        # Add a few blades of grass with subtle variation
-        for blade_x in range(top_rect.left + 6, top_rect.right - 6, 12):
-            height = random.randint(6, 12)
-            color_variation = min(255, GROUND_GREEN[1] + random.randint(0, 30))
-            pygame.draw.line(
-                self.image,
-                (GROUND_GREEN[0], color_variation, GROUND_GREEN[2]),
-                (blade_x, top_rect.top + 2),
-                (blade_x + random.randint(-2, 2), top_rect.top - height),
-                2,
-            )
+
+def _build_tile_surface(image, rng):
+    base_rect = image.get_rect()
+    # Shadow base to give the tile depth
+    pygame.draw.rect(image, GROUND_SHADOW, base_rect, border_radius=6)
+
+    # Slight inset for the grassy top
+    top_rect = base_rect.inflate(-6, -6)
+    top_rect.height -= 6
+    top_rect.y += 2
+    pygame.draw.rect(image, GROUND_GREEN, top_rect, border_radius=6)
+
+    # Soft highlight near the top edge
+    highlight = create((top_rect.width, 8))
+    highlight.fill((*WHITE, 45))
+    image.blit(highlight, (top_rect.x, top_rect.y + 3))
+
+    # Horizontal ridges for texture
+    for offset in (top_rect.bottom - 12, top_rect.bottom - 20):
+        pygame.draw.line(
+            image,
+            (*BLACK, 35),
+            (top_rect.left + 6, offset),
+            (top_rect.right - 6, offset),
+            2,
+        )
+
+    # Add a few blades of grass with subtle variation
+    for blade_x in range(top_rect.left + 6, top_rect.right - 6, 12):
+        height = rng.randint(6, 12)
+        color_variation = min(255, GROUND_GREEN[1] + rng.randint(0, 30))
+        pygame.draw.line(
+            image,
+            (GROUND_GREEN[0], color_variation, GROUND_GREEN[2]),
+            (blade_x, top_rect.top + 2),
+            (blade_x + rng.randint(-2, 2), top_rect.top - height),
+            2,
+        )